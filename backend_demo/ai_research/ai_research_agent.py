@@ -26,6 +26,10 @@ from backend_demo.ai_research.web_retriever import (
 )
 from backend_demo.ai_research.research_enums import ReportType, ReportSource, Tone
 from backend_demo.ai_research.embedding_service import Memory
+from backend_demo.ai_research.llm_semantic_cache import (
+    UncachedResult,
+    semantic_cache,
+)
 from utils.llm_tools import init_language_model
 
 
@@ -52,6 +56,7 @@ class Subtopics(BaseModel):
     subtopics: List[Subtopic] = []
 
 
+@semantic_cache(prompt_args=("query",), exact_args=("parent_query",))
 @retry(stop=stop_after_attempt(3), wait=wait_fixed(2))
 async def choose_agent(
     query: str, cfg: Config, parent_query: Optional[str] = None
@@ -104,12 +109,19 @@ Important instructions:
         return agent_dict["server"], agent_dict["agent_role_prompt"]
     except json.JSONDecodeError:
         print("解析JSON时出错。使用默认代理。")
-        return "默认代理", (
-            "你是一个AI批判性思维研究助手。你的唯一目的是就给定文本撰写结构良好、"
-            "批评性强、客观公正的报告。"
+        return UncachedResult(
+            (
+                "默认代理",
+                "你是一个AI批判性思维研究助手。你的唯一目的是就给定文本撰写结构良好、"
+                "批评性强、客观公正的报告。",
+            )
         )
 
 
+@semantic_cache(
+    prompt_args=("query",),
+    exact_args=("agent_role_prompt", "parent_query", "report_type"),
+)
 async def get_sub_queries(
     query: str,
     agent_role_prompt: str,
@@ -152,9 +164,10 @@ async def get_sub_queries(
         return sub_queries
     except json.JSONDecodeError:
         print("解析JSON时出错。返回原始查询。")
-        return [query]
+        return UncachedResult([query])
 
 
+@semantic_cache(prompt_args=("task",), exact_args=("data", "subtopics"))
 @retry(stop=stop_after_attempt(3), wait=wait_fixed(2))
 async def construct_subtopics(
     task: str, data: str, config: Config, subtopics: List[Dict[str, str]] = []
@@ -207,9 +220,21 @@ async def construct_subtopics(
 
     except Exception as e:
         print("解析子主题时出现异常：", e)
-        return subtopics
-
-
+        return UncachedResult(subtopics)
+
+
+@semantic_cache(
+    prompt_args=("query",),
+    exact_args=(
+        "context",
+        "agent_role_prompt",
+        "report_type",
+        "tone",
+        "report_source",
+        "main_topic",
+        "existing_headers",
+    ),
+)
 async def generate_report(
     query: str,
     context: str,
@@ -279,6 +304,7 @@ async def generate_report(
     return response.content
 
 
+@semantic_cache(prompt_args=("query",), exact_args=("context", "role"))
 async def get_report_introduction(
     query: str,
     context: str,
@@ -22,6 +22,12 @@ class Config:
         self.retriever = os.getenv("RETRIEVER", "tavily")
         self.embedding_provider = os.getenv("EMBEDDING_PROVIDER", "openai")
         self.embedding_api_key = os.getenv("EMBEDDING_API_KEY", "")
+        self.embedding_target_dim = int(os.getenv("EMBEDDING_TARGET_DIM", 0)) or None
+        self.embedding_precision = os.getenv("EMBEDDING_PRECISION", "int8")
+        self.embedding_batch_size = int(os.getenv("EMBEDDING_BATCH_SIZE", 256))
+        self.embedding_cache_path = os.getenv(
+            "EMBEDDING_CACHE_PATH", "data/llm_cache/embeddings.db"
+        )
         self.similarity_threshold = float(os.getenv("SIMILARITY_THRESHOLD", 0.38))
         self.llm_provider = os.getenv("LLM_PROVIDER", "openai")
         self.llm_model = "gpt-4-1106-preview"
@@ -43,7 +49,27 @@ class Config:
         self.max_iterations = int(os.getenv("MAX_ITERATIONS", 5))
         self.agent_role = os.getenv("AGENT_ROLE")
         self.scraper = os.getenv("SCRAPER", "bs")
+        self.search_cache_path = os.getenv(
+            "SEARCH_CACHE_PATH", "data/llm_cache/search_cache.db"
+        )
+        self.search_cache_ttl_hours = float(os.getenv("SEARCH_CACHE_TTL_HOURS", 24))
+        self.scrape_timeout = float(os.getenv("SCRAPE_TIMEOUT", 4))
+        self.max_concurrent_scrapes = int(os.getenv("MAX_CONCURRENT_SCRAPES", 50))
+        self.max_scrapes_per_host = int(os.getenv("MAX_SCRAPES_PER_HOST", 2))
         self.max_subtopics = int(os.getenv("MAX_SUBTOPICS", 5))
+        self.subtopic_context_max_results = int(
+            os.getenv("SUBTOPIC_CONTEXT_MAX_RESULTS", 10)
+        )
+        self.max_concurrent_subtopics = int(os.getenv("MAX_CONCURRENT_SUBTOPICS", 5))
+        self.enable_semantic_cache = (
+            os.getenv("ENABLE_SEMANTIC_CACHE", "false").lower() == "true"
+        )
+        self.semantic_cache_path = os.getenv(
+            "SEMANTIC_CACHE_PATH", "data/llm_cache/semantic_cache.db"
+        )
+        self.semantic_cache_threshold = float(
+            os.getenv("SEMANTIC_CACHE_THRESHOLD", 0.97)
+        )
         self.doc_path = os.getenv("DOC_PATH", "")
         self.llm_kwargs = {}
 
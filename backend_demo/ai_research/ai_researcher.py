@@ -8,7 +8,9 @@ from backend_demo.ai_research.research_enums import ReportType, ReportSource, To
 from backend_demo.ai_research.web_retriever import (
     get_retriever,
     get_default_retriever,
-    scrape_urls,
+    ascrape_urls,
+    AsyncScraper,
+    SearchCache,
     ContextCompressor,
 )
 from backend_demo.ai_research.embedding_service import Memory
@@ -68,7 +70,19 @@ class AIResearcher:
         self.verbose = verbose
         self.verbose_callback = verbose_callback
         self.context: List[str] = []
-        self.memory = Memory(self.cfg.embedding_provider)
+        self.compressor: Optional[ContextCompressor] = None
+        self.retriever_class = (
+            get_retriever(self.cfg.retriever) or get_default_retriever()
+        )
+        self.search_cache = SearchCache(
+            self.cfg.search_cache_path, self.cfg.search_cache_ttl_hours
+        )
+        self.memory = Memory(
+            self.cfg.embedding_provider,
+            cache_path=self.cfg.embedding_cache_path,
+            batch_size=self.cfg.embedding_batch_size,
+            target_dim=self.cfg.embedding_target_dim,
+        )
 
         # 更新配置
         if max_iterations is not None:
@@ -89,39 +103,70 @@ class AIResearcher:
             if self.verbose_callback:
                 self.verbose_callback(message)
 
-    async def process_sub_query(self, sub_query: str, index: int, total: int) -> str:
+    async def process_sub_query(
+        self,
+        sub_query: str,
+        index: int,
+        total: int,
+        scraper: Optional[AsyncScraper] = None,
+    ) -> List[Dict[str, Any]]:
         """
-        处理子查询
+        处理子查询：搜索并抓取相关网页
 
         :param sub_query: 子查询
         :param index: 当前子查询索引
         :param total: 总子查询数
-        :return: 压缩后的上下文
+        :param scraper: 共享的异步抓取器（可选）
+        :return: 抓取的网页内容列表
         """
         self.log(f"正在处理子查询...")
 
-        retriever_class = get_retriever(self.cfg.retriever) or get_default_retriever()
-        retriever = retriever_class(sub_query)
-        self.log(f"使用检索器: {retriever.__class__.__name__}")
-
-        search_results = retriever.search(
-            max_results=self.cfg.max_search_results_per_query
-        )
+        self.log(f"使用检索器: {self.retriever_class.__name__}")
+        search_results = await asyncio.to_thread(self.search, sub_query)
 
         urls = [result["href"] for result in search_results]
         self.log(f"正在为子查询抓取 URL...")
 
-        scraped_content = scrape_urls(urls, self.cfg)
+        return await ascrape_urls(urls, self.cfg, scraper)
 
-        context_compressor = ContextCompressor(
-            scraped_content, self.memory.get_embeddings()
-        )
-        self.log(f"正在为子查询压缩上下文...")
+    def search(self, sub_query: str) -> List[Dict[str, str]]:
+        """
+        执行搜索，优先使用缓存的结果
+
+        :param sub_query: 子查询
+        :return: 搜索结果列表
+        """
+        retriever_name = self.retriever_class.__name__
+        max_results = self.cfg.max_search_results_per_query
+        search_results = self.search_cache.get(retriever_name, sub_query, max_results)
+        if search_results is None:
+            search_results = self.retriever_class(sub_query).search(
+                max_results=max_results
+            )
+            # 不缓存空结果，避免把搜索失败当作有效响应
+            if search_results:
+                self.search_cache.set(
+                    retriever_name, sub_query, max_results, search_results
+                )
+        return search_results
 
-        compressed_context = await context_compressor.get_context(sub_query)
-        self.log(f"子查询的上下文压缩完成。")
+    async def embed_in_batches(self, texts: List[str]) -> List[List[float]]:
+        """
+        分批计算文本向量
 
-        return compressed_context
+        :param texts: 文本列表
+        :return: 向量列表
+        """
+        embeddings = self.memory.get_embeddings()
+        batch_size = self.cfg.embedding_batch_size
+        vectors: List[List[float]] = []
+        for start in range(0, len(texts), batch_size):
+            vectors.extend(
+                await asyncio.to_thread(
+                    embeddings.embed_documents, texts[start : start + batch_size]
+                )
+            )
+        return vectors
 
     async def conduct_research(self) -> List[str]:
         """
@@ -142,22 +187,69 @@ class AIResearcher:
 
         self.log(f"开始为 {len(sub_queries)} 个子查询进行搜索和抓取...")
 
+        # 所有子查询共用一个上下文压缩器，抓取结果陆续到达时增量分块、计算向量并加入索引
+        self.compressor = ContextCompressor(
+            [], self.memory.get_embeddings(), precision=self.cfg.embedding_precision
+        )
+        seen = set()
+
+        async def index_scraped_content(scraped_content: List[Dict[str, Any]]) -> None:
+            chunks = []
+            for chunk in self.compressor.split_documents(scraped_content):
+                if chunk.page_content not in seen:
+                    seen.add(chunk.page_content)
+                    chunks.append(chunk)
+            if chunks:
+                self.log(f"正在为 {len(chunks)} 个文本块计算向量...")
+                vectors = await self.embed_in_batches(
+                    [chunk.page_content for chunk in chunks]
+                )
+                self.compressor.add_documents(chunks, vectors)
+
         semaphore = asyncio.Semaphore(5)  # 限制并发数量
 
         async def limited_process_sub_query(*args):
             async with semaphore:
-                return await self.process_sub_query(*args)
-
-        tasks = [
-            limited_process_sub_query(sub_query, i + 1, len(sub_queries))
-            for i, sub_query in enumerate(sub_queries)
-        ]
-        self.context = await asyncio.gather(*tasks)
+                scraped_content = await self.process_sub_query(*args)
+            await index_scraped_content(scraped_content)
+
+        # 所有子查询共享同一个抓取会话，连接池与单主机并发限制对全体生效
+        async with AsyncScraper(self.cfg) as scraper:
+            tasks = [
+                limited_process_sub_query(sub_query, i + 1, len(sub_queries), scraper)
+                for i, sub_query in enumerate(sub_queries)
+            ]
+            await asyncio.gather(*tasks)
+
+        self.log(f"正在压缩上下文...")
+        self.context = await asyncio.gather(
+            *[self.compressor.get_context(sub_query) for sub_query in sub_queries]
+        )
 
         self.log(f"研究阶段完成。共收集上下文数量: {len(self.context)}")
 
         return self.context
 
+    async def get_subtopic_contexts(self, subtopics: List[Dict[str, Any]]) -> List[str]:
+        """
+        复用研究阶段的文本块向量，为每个子主题检索相关上下文
+
+        :param subtopics: 子主题列表
+        :return: 每个子主题的上下文，无可用文本块时为空字符串
+        """
+        if self.compressor is None or not self.compressor.get_chunks():
+            return [""] * len(subtopics)
+
+        return await asyncio.gather(
+            *[
+                self.compressor.get_context(
+                    subtopic["task"],
+                    max_results=self.cfg.subtopic_context_max_results,
+                )
+                for subtopic in subtopics
+            ]
+        )
+
     async def generate_report(self) -> str:
         """
         生成研究报告
@@ -172,34 +264,44 @@ class AIResearcher:
         if self.report_type == ReportType.DetailedReport.value:
             self.log("生成详细报告...")
 
-            self.log("构建子主题...")
-            subtopics = await construct_subtopics(self.query, full_context, self.cfg)
-            self.log(f"生成了 {len(subtopics)} 个子主题")
-
-            self.log("生成报告引言...")
-            introduction = await get_report_introduction(
-                self.query, full_context, self.role, self.cfg
+            self.log("构建子主题并生成报告引言...")
+            subtopics, introduction = await asyncio.gather(
+                construct_subtopics(self.query, full_context, self.cfg),
+                get_report_introduction(self.query, full_context, self.role, self.cfg),
+            )
+            self.log(f"生成了 {len(subtopics)} 个子主题，引言生成成功")
+
+            existing_headers = [s["task"] for s in subtopics]
+            subtopic_contexts = await self.get_subtopic_contexts(subtopics)
+            semaphore = asyncio.Semaphore(self.cfg.max_concurrent_subtopics or 5)
+
+            async def limited_generate_subtopic_report(
+                i: int, subtopic: Dict[str, Any]
+            ) -> str:
+                async with semaphore:
+                    self.log(
+                        f"正在为子主题 {i}/{len(subtopics)} 生成报告: '{subtopic['task']}'"
+                    )
+                    subtopic_report = await generate_report(
+                        subtopic["task"],
+                        subtopic_contexts[i - 1] or full_context,
+                        self.role,
+                        "subtopic_report",
+                        self.tone,
+                        self.report_source,
+                        self.cfg,
+                        main_topic=self.query,
+                        existing_headers=existing_headers,
+                    )
+                    self.log(f"子主题 {i} 的报告生成成功")
+                    return subtopic_report
+
+            subtopic_reports = await asyncio.gather(
+                *[
+                    limited_generate_subtopic_report(i, subtopic)
+                    for i, subtopic in enumerate(subtopics, 1)
+                ]
             )
-            self.log("引言生成成功")
-
-            subtopic_reports = []
-            for i, subtopic in enumerate(subtopics, 1):
-                self.log(
-                    f"正在为子主题 {i}/{len(subtopics)} 生成报告: '{subtopic['task']}'"
-                )
-                subtopic_report = await generate_report(
-                    subtopic["task"],
-                    full_context,
-                    self.role,
-                    "subtopic_report",
-                    self.tone,
-                    self.report_source,
-                    self.cfg,
-                    main_topic=self.query,
-                    existing_headers=[s["task"] for s in subtopics],
-                )
-                subtopic_reports.append(subtopic_report)
-                self.log(f"子主题 {i} 的报告生成成功")
 
             full_report = f"{introduction}\n\n" + "\n\n".join(subtopic_reports)
             self.log("详细报告编译完成")
@@ -1,21 +1,297 @@
 # backend_demo/ai_research/embedding_service.py
 import os
-from typing import List, Optional
+import hashlib
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
 from langchain.embeddings.base import Embeddings
 from utils.llm_tools import CustomEmbeddings
 
 
+class CachedEmbeddings(Embeddings):
+    """带缓存的嵌入模型，内存 LRU + SQLite 持久化，按文本内容哈希命中"""
+
+    def __init__(
+        self,
+        embeddings: Embeddings,
+        namespace: str,
+        cache_path: Optional[str] = None,
+        max_memory_items: int = 10000,
+        target_dim: Optional[int] = None,
+    ):
+        """
+        初始化带缓存的嵌入模型
+
+        :param embeddings: 底层嵌入模型
+        :param namespace: 缓存命名空间（提供者与模型名），切换模型时不会命中旧缓存
+        :param cache_path: SQLite 缓存文件路径，为空时仅使用内存缓存
+        :param max_memory_items: 内存 LRU 缓存的最大条目数
+        :param target_dim: 目标维度，设置后截取向量前缀并重新归一化（适用于 Matryoshka 训练的模型）
+        """
+        self._embeddings = embeddings
+        self.target_dim = target_dim
+        self.namespace = f"{namespace}:{target_dim}" if target_dim else namespace
+        self.max_memory_items = max_memory_items
+        self._memory: "OrderedDict[bytes, List[float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._conn = None
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+        if cache_path:
+            os.makedirs(os.path.dirname(cache_path) or ".", exist_ok=True)
+            self._conn = sqlite3.connect(cache_path, check_same_thread=False)
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS embeddings "
+                "(key BLOB PRIMARY KEY, dim INT, vec BLOB)"
+            )
+            self._conn.commit()
+
+    def _make_key(self, text: str) -> bytes:
+        """
+        计算文本的缓存键
+
+        :param text: 文本
+        :return: 缓存键
+        """
+        return hashlib.blake2b(
+            f"{self.namespace}\0{text}".encode(), digest_size=16
+        ).digest()
+
+    def _reduce(self, vectors: List[List[float]]) -> List[List[float]]:
+        """
+        截取向量前缀到目标维度并重新归一化
+
+        :param vectors: 原始向量列表
+        :return: 降维后的向量列表
+        """
+        if not self.target_dim:
+            return vectors
+        reduced = np.asarray(vectors, dtype=np.float32)[:, : self.target_dim]
+        norms = np.linalg.norm(reduced, axis=1, keepdims=True)
+        return (reduced / np.maximum(norms, 1e-12)).tolist()
+
+    def _remember(self, key: bytes, vector: List[float]) -> None:
+        """
+        写入内存 LRU 缓存
+
+        :param key: 缓存键
+        :param vector: 嵌入向量
+        """
+        self._memory[key] = vector
+        self._memory.move_to_end(key)
+        if len(self._memory) > self.max_memory_items:
+            self._memory.popitem(last=False)
+
+    def _lookup(self, keys: List[bytes]) -> Dict[bytes, List[float]]:
+        """
+        依次在内存和 SQLite 中查找缓存
+
+        :param keys: 缓存键列表
+        :return: 命中的缓存键到向量的映射
+        """
+        found = {}
+        pending = []
+        for key in keys:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                found[key] = self._memory[key]
+            else:
+                pending.append(key)
+
+        if pending and self._conn is not None:
+            placeholders = ",".join("?" * len(pending))
+            rows = self._conn.execute(
+                f"SELECT key, vec FROM embeddings WHERE key IN ({placeholders})",
+                pending,
+            ).fetchall()
+            for key, vec in rows:
+                vector = np.frombuffer(vec, dtype=np.float16).astype(float).tolist()
+                self._remember(key, vector)
+                found[key] = vector
+        return found
+
+    def _store(self, items: Dict[bytes, List[float]]) -> None:
+        """
+        写入内存与 SQLite 缓存
+
+        :param items: 缓存键到向量的映射
+        """
+        for key, vector in items.items():
+            self._remember(key, vector)
+        if self._conn is not None and items:
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO embeddings (key, dim, vec) VALUES (?, ?, ?)",
+                [
+                    (key, len(vector), np.asarray(vector, dtype=np.float16).tobytes())
+                    for key, vector in items.items()
+                ],
+            )
+            self._conn.commit()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        keys = [self._make_key(text) for text in texts]
+        with self._lock:
+            found = self._lookup(keys)
+
+        missing: Dict[bytes, str] = {}
+        for key, text in zip(keys, texts):
+            if key not in found and key not in missing:
+                missing[key] = text
+
+        self.cache_hits += len(texts) - len(missing)
+        self.cache_misses += len(missing)
+
+        if missing:
+            vectors = self._reduce(
+                self._embeddings.embed_documents(list(missing.values()))
+            )
+            computed = dict(zip(missing.keys(), vectors))
+            with self._lock:
+                self._store(computed)
+            found.update(computed)
+
+        return [found[key] for key in keys]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_documents([text])[0]
+
+
+class QuantizedEmbeddingStore:
+    """量化向量存储，以 int8 或二值形式保存归一化向量并计算余弦相似度"""
+
+    def __init__(self, precision: str = "int8", rescore_multiplier: int = 4):
+        """
+        初始化量化向量存储
+
+        :param precision: 存储精度，可选 "float32"、"int8"、"binary"
+        :param rescore_multiplier: 二值模式下汉明预筛候选数相对 top_k 的倍数
+        :raises ValueError: 当精度不支持时抛出
+        """
+        if precision not in ("float32", "int8", "binary"):
+            raise ValueError(f"不支持的向量精度: {precision}")
+        self.precision = precision
+        self.rescore_multiplier = rescore_multiplier
+        self._vectors: Optional[np.ndarray] = None
+        self._codes: Optional[np.ndarray] = None
+        self._scales: Optional[np.ndarray] = None
+
+    def __len__(self) -> int:
+        for array in (self._vectors, self._codes):
+            if array is not None:
+                return len(array)
+        return 0
+
+    @staticmethod
+    def _normalize(vectors: np.ndarray) -> np.ndarray:
+        """
+        将向量归一化为单位长度
+
+        :param vectors: 二维向量矩阵
+        :return: 归一化后的 float32 矩阵
+        """
+        vectors = np.asarray(vectors, dtype=np.float32)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors / np.maximum(norms, 1e-12)
+
+    @staticmethod
+    def _quantize_int8(vectors: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        按向量对称量化为 int8
+
+        :param vectors: 归一化后的向量矩阵
+        :return: int8 编码矩阵与每个向量的缩放系数
+        """
+        scales = np.abs(vectors).max(axis=1) / 127.0
+        scales = np.maximum(scales, 1e-12).astype(np.float32)
+        codes = np.round(vectors / scales[:, None]).astype(np.int8)
+        return codes, scales
+
+    def add(self, vectors: List[List[float]]) -> None:
+        """
+        添加向量
+
+        :param vectors: 向量列表
+        """
+        if len(vectors) == 0:
+            return
+        normalized = self._normalize(vectors)
+
+        if self.precision == "int8":
+            codes, scales = self._quantize_int8(normalized)
+            self._codes = self._append(self._codes, codes)
+            self._scales = self._append(self._scales, scales)
+            return
+
+        if self.precision == "binary":
+            self._codes = self._append(self._codes, np.packbits(normalized > 0, axis=1))
+        # 二值模式保留 float32 向量用于候选重排序
+        self._vectors = self._append(self._vectors, normalized)
+
+    @staticmethod
+    def _append(current: Optional[np.ndarray], new: np.ndarray) -> np.ndarray:
+        if current is None:
+            return np.ascontiguousarray(new)
+        return np.concatenate([current, new])
+
+    def similarity(
+        self, query_vector: List[float], top_k: Optional[int] = None
+    ) -> np.ndarray:
+        """
+        计算查询向量与所有存储向量的余弦相似度
+
+        :param query_vector: 查询向量
+        :param top_k: 二值模式下需要精确重排的结果数，未入选的向量相似度记为 -1
+        :return: 相似度数组
+        """
+        if len(self) == 0:
+            return np.empty(0, dtype=np.float32)
+        query = self._normalize(np.asarray(query_vector)[None, :])
+
+        if self.precision == "int8":
+            query_codes, query_scales = self._quantize_int8(query)
+            dots = self._codes.astype(np.int32) @ query_codes[0].astype(np.int32)
+            return dots * self._scales * query_scales[0]
+
+        if self.precision == "binary":
+            query_bits = np.packbits(query[0] > 0)
+            distances = np.unpackbits(
+                np.bitwise_xor(self._codes, query_bits), axis=1
+            ).sum(axis=1)
+            n_candidates = min(
+                len(self), (top_k or len(self)) * self.rescore_multiplier
+            )
+            candidates = np.argpartition(distances, n_candidates - 1)[:n_candidates]
+            scores = np.full(len(self), -1.0, dtype=np.float32)
+            scores[candidates] = self._vectors[candidates] @ query[0]
+            return scores
+
+        return self._vectors @ query[0]
+
+
 class Memory:
     """内存类，用于管理和获取嵌入模型"""
 
     def __init__(
-        self, embedding_provider: str, headers: Optional[dict] = None, **kwargs
+        self,
+        embedding_provider: str,
+        headers: Optional[dict] = None,
+        cache_path: Optional[str] = None,
+        batch_size: int = 1,
+        target_dim: Optional[int] = None,
+        **kwargs,
     ):
         """
         初始化内存类
 
         :param embedding_provider: 嵌入提供者的名称
         :param headers: 可选的HTTP头部信息
+        :param cache_path: 可选的嵌入缓存文件路径
+        :param batch_size: 单次嵌入请求包含的文本数
+        :param target_dim: 可选的向量目标维度
         :param kwargs: 其他可选参数
         :raises ValueError: 当嵌入提供者不支持时抛出
         """
@@ -23,10 +299,17 @@ class Memory:
         headers = headers or {}
 
         if embedding_provider == "openai":
-            self._embeddings = CustomEmbeddings(
-                api_key=os.getenv("EMBEDDING_API_KEY", ""),
-                api_url=os.getenv("EMBEDDING_API_BASE", ""),
-                model=os.getenv("EMBEDDING_MODEL", ""),
+            model = os.getenv("EMBEDDING_MODEL", "")
+            self._embeddings = CachedEmbeddings(
+                CustomEmbeddings(
+                    api_key=os.getenv("EMBEDDING_API_KEY", ""),
+                    api_url=os.getenv("EMBEDDING_API_BASE", ""),
+                    model=model,
+                    batch_size=batch_size,
+                ),
+                namespace=f"{embedding_provider}:{model}",
+                cache_path=cache_path,
+                target_dim=target_dim,
             )
         else:
             raise ValueError("不支持的嵌入提供者。")
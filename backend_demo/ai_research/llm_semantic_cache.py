@@ -0,0 +1,221 @@
+# backend_demo/ai_research/llm_semantic_cache.py
+
+import os
+import json
+import asyncio
+import hashlib
+import inspect
+import sqlite3
+import threading
+from enum import Enum
+from functools import wraps
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from langchain.embeddings.base import Embeddings
+
+from backend_demo.ai_research.ai_research_config import Config
+from backend_demo.ai_research.embedding_service import Memory, QuantizedEmbeddingStore
+
+
+class UncachedResult:
+    """失败时的回退值：semantic_cache 照常返回其中的值，但不写入缓存"""
+
+    def __init__(self, value: Any):
+        """
+        :param value: 回退值
+        """
+        self.value = value
+
+
+def _unwrap(result: Any) -> Any:
+    """
+    取出回退值包装中的实际结果
+
+    :param result: 被装饰函数的返回值
+    :return: 实际结果
+    """
+    return result.value if isinstance(result, UncachedResult) else result
+
+
+class SemanticCache:
+    """语义缓存，按提示向量的最近邻命中历史 LLM 输出"""
+
+    def __init__(
+        self,
+        embeddings: Embeddings,
+        cache_path: str,
+        threshold: float = 0.97,
+        precision: str = "int8",
+    ):
+        """
+        初始化语义缓存
+
+        :param embeddings: 用于计算提示向量的嵌入模型
+        :param cache_path: SQLite 缓存文件路径
+        :param threshold: 命中所需的最小余弦相似度
+        :param precision: 向量索引的存储精度
+        """
+        self.embeddings = embeddings
+        self.threshold = threshold
+        self.precision = precision
+        self._indexes: Dict[str, Tuple[QuantizedEmbeddingStore, List[str]]] = {}
+        self._lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(cache_path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(cache_path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses "
+            "(id INTEGER PRIMARY KEY, namespace TEXT, vec BLOB, response TEXT)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_namespace ON responses (namespace)"
+        )
+        self._conn.commit()
+
+    def _get_index(self, namespace: str) -> Tuple[QuantizedEmbeddingStore, List[str]]:
+        """
+        获取命名空间对应的向量索引，首次访问时从 SQLite 加载
+
+        :param namespace: 命名空间
+        :return: 向量索引与对应的响应列表
+        """
+        if namespace not in self._indexes:
+            rows = self._conn.execute(
+                "SELECT vec, response FROM responses WHERE namespace = ? ORDER BY id",
+                (namespace,),
+            ).fetchall()
+            store = QuantizedEmbeddingStore(self.precision)
+            store.add([np.frombuffer(vec, dtype=np.float32) for vec, _ in rows])
+            self._indexes[namespace] = (store, [response for _, response in rows])
+        return self._indexes[namespace]
+
+    def lookup(self, namespace: str, vector: List[float]) -> Optional[Any]:
+        """
+        查找语义相近的历史响应
+
+        :param namespace: 命名空间
+        :param vector: 提示向量
+        :return: 命中的响应，未命中时返回 None
+        """
+        with self._lock:
+            store, responses = self._get_index(namespace)
+            if not responses:
+                return None
+            similarity = store.similarity(vector, top_k=1)
+            best = int(np.argmax(similarity))
+            if similarity[best] < self.threshold:
+                return None
+            return json.loads(responses[best])
+
+    def insert(self, namespace: str, vector: List[float], response: Any) -> None:
+        """
+        写入新的响应
+
+        :param namespace: 命名空间
+        :param vector: 提示向量
+        :param response: LLM 响应（需可 JSON 序列化）
+        """
+        payload = json.dumps(response, ensure_ascii=False)
+        with self._lock:
+            store, responses = self._get_index(namespace)
+            store.add([vector])
+            responses.append(payload)
+            self._conn.execute(
+                "INSERT INTO responses (namespace, vec, response) VALUES (?, ?, ?)",
+                (namespace, np.asarray(vector, dtype=np.float32).tobytes(), payload),
+            )
+            self._conn.commit()
+
+
+_semantic_caches: Dict[str, SemanticCache] = {}
+
+
+def get_semantic_cache(cfg: Config) -> SemanticCache:
+    """
+    获取（或创建）配置对应的语义缓存实例
+
+    :param cfg: 配置对象
+    :return: 语义缓存实例
+    """
+    if cfg.semantic_cache_path not in _semantic_caches:
+        memory = Memory(cfg.embedding_provider, cache_path=cfg.embedding_cache_path)
+        _semantic_caches[cfg.semantic_cache_path] = SemanticCache(
+            memory.get_embeddings(),
+            cfg.semantic_cache_path,
+            threshold=cfg.semantic_cache_threshold,
+            precision=cfg.embedding_precision,
+        )
+    return _semantic_caches[cfg.semantic_cache_path]
+
+
+def _to_text(value: Any) -> str:
+    """
+    将参数值转换为规范化字符串
+
+    :param value: 参数值
+    :return: 规范化字符串
+    """
+    if isinstance(value, Enum):
+        value = value.value
+    if isinstance(value, str):
+        return value
+    return json.dumps(value, ensure_ascii=False, sort_keys=True, default=str)
+
+
+def semantic_cache(
+    prompt_args: Sequence[str], exact_args: Sequence[str] = ()
+) -> Callable:
+    """
+    为异步 LLM 调用添加语义缓存的装饰器，仅在 cfg.enable_semantic_cache 为真时生效。
+    被装饰函数在解析失败等情况下应返回 UncachedResult 包装的回退值，
+    这些值只返回给调用方，不会写入缓存
+
+    :param prompt_args: 参与向量相似度匹配的参数名
+    :param exact_args: 需要精确匹配的参数名（如长上下文、报告类型），只参与命名空间哈希
+    :return: 装饰器
+    """
+
+    def decorator(func: Callable) -> Callable:
+        signature = inspect.signature(func)
+
+        @wraps(func)
+        async def wrapper(*args, **kwargs):
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            cfg = next(
+                (v for v in bound.arguments.values() if isinstance(v, Config)), None
+            )
+            if cfg is None or not cfg.enable_semantic_cache:
+                return _unwrap(await func(*args, **kwargs))
+
+            arguments = bound.arguments
+            exact_parts = [func.__qualname__, os.getenv("LLM_MODEL", "")] + [
+                f"{name}: {_to_text(arguments[name])}" for name in exact_args
+            ]
+            prompt_parts = [
+                f"{name}: {_to_text(arguments[name])}" for name in prompt_args
+            ]
+            namespace = hashlib.blake2b(
+                "\0".join(exact_parts).encode(), digest_size=16
+            ).hexdigest()
+
+            cache = get_semantic_cache(cfg)
+            vector = await asyncio.to_thread(
+                cache.embeddings.embed_query, "\n".join(prompt_parts)
+            )
+            cached = cache.lookup(namespace, vector)
+            if cached is not None:
+                return cached
+
+            result = await func(*args, **kwargs)
+            # 回退值与空结果都不缓存，避免一次失败被之后所有相似查询重放
+            if isinstance(result, UncachedResult):
+                return result.value
+            if result:
+                cache.insert(namespace, vector, result)
+            return result
+
+        return wrapper
+
+    return decorator
@@ -1,7 +1,16 @@
 # backend_demo/ai_research/web_retriever.py
 
 import os
-from typing import List, Dict, Any
+import json
+import time
+import asyncio
+import sqlite3
+import threading
+from collections import defaultdict
+from typing import List, Dict, Any, Optional, Tuple
+from urllib.parse import urlparse
+import aiohttp
+import numpy as np
 import requests
 from bs4 import BeautifulSoup
 from concurrent.futures import ThreadPoolExecutor
@@ -19,6 +28,8 @@ from langchain.text_splitter import RecursiveCharacterTextSplitter
 from langchain_core.documents import Document
 from langchain_core.retrievers import BaseRetriever
 
+from backend_demo.ai_research.embedding_service import QuantizedEmbeddingStore
+
 
 class TavilySearch:
     """Tavily搜索客户端"""
@@ -81,6 +92,81 @@ class TavilySearch:
                 return []
 
 
+class SearchCache:
+    """搜索结果缓存，内存字典 + SQLite 持久化，按检索器、查询与结果数命中"""
+
+    def __init__(self, cache_path: Optional[str] = None, ttl_hours: float = 24):
+        """
+        初始化搜索结果缓存
+
+        :param cache_path: SQLite 缓存文件路径，为空时仅使用内存缓存
+        :param ttl_hours: 缓存有效期（小时），过期后重新搜索
+        """
+        self.ttl_seconds = ttl_hours * 3600
+        self._memory: Dict[Tuple[str, str, int], Tuple[float, List]] = {}
+        self._lock = threading.Lock()
+        self._conn = None
+
+        if cache_path:
+            os.makedirs(os.path.dirname(cache_path) or ".", exist_ok=True)
+            self._conn = sqlite3.connect(cache_path, check_same_thread=False)
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS searches "
+                "(retriever TEXT, query TEXT, max_results INT, created REAL, "
+                "results TEXT, PRIMARY KEY (retriever, query, max_results))"
+            )
+            self._conn.commit()
+
+    def get(
+        self, retriever: str, query: str, max_results: int
+    ) -> Optional[List[Dict[str, str]]]:
+        """
+        读取缓存的搜索结果
+
+        :param retriever: 检索器名称
+        :param query: 搜索查询
+        :param max_results: 最大结果数
+        :return: 搜索结果列表，未命中或已过期时返回 None
+        """
+        key = (retriever, query, max_results)
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is None and self._conn is not None:
+                row = self._conn.execute(
+                    "SELECT created, results FROM searches "
+                    "WHERE retriever = ? AND query = ? AND max_results = ?",
+                    key,
+                ).fetchone()
+                if row is not None:
+                    entry = (row[0], json.loads(row[1]))
+                    self._memory[key] = entry
+        if entry is None or time.time() - entry[0] > self.ttl_seconds:
+            return None
+        return entry[1]
+
+    def set(
+        self, retriever: str, query: str, max_results: int, results: List[Dict]
+    ) -> None:
+        """
+        写入搜索结果
+
+        :param retriever: 检索器名称
+        :param query: 搜索查询
+        :param max_results: 最大结果数
+        :param results: 搜索结果列表
+        """
+        key = (retriever, query, max_results)
+        created = time.time()
+        with self._lock:
+            self._memory[key] = (created, results)
+            if self._conn is not None:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO searches VALUES (?, ?, ?, ?, ?)",
+                    (*key, created, json.dumps(results, ensure_ascii=False)),
+                )
+                self._conn.commit()
+
+
 def get_retriever(retriever: str):
     """
     获取检索器
@@ -121,23 +207,33 @@ class BeautifulSoupScraper:
         """
         try:
             response = self.session.get(self.link, timeout=4)
-            soup = BeautifulSoup(
-                response.content, "lxml", from_encoding=response.encoding
-            )
-
-            for script_or_style in soup(["script", "style"]):
-                script_or_style.extract()
-
-            raw_content = self._get_content_from_url(soup)
-            lines = (line.strip() for line in raw_content.splitlines())
-            chunks = (phrase.strip() for line in lines for phrase in line.split("  "))
-            return "\n".join(chunk for chunk in chunks if chunk)
+            return self.extract_text(response.content, response.encoding)
 
         except Exception as e:
             print(f"抓取 {self.link} 时出错: {str(e)}")
             return ""
 
-    def _get_content_from_url(self, soup: BeautifulSoup) -> str:
+    @classmethod
+    def extract_text(cls, content: bytes, encoding: Optional[str] = None) -> str:
+        """
+        从网页原始内容中提取正文文本
+
+        :param content: 网页原始字节内容
+        :param encoding: 网页编码（可选）
+        :return: 提取的文本
+        """
+        soup = BeautifulSoup(content, "lxml", from_encoding=encoding)
+
+        for script_or_style in soup(["script", "style"]):
+            script_or_style.extract()
+
+        raw_content = cls._get_content_from_url(soup)
+        lines = (line.strip() for line in raw_content.splitlines())
+        chunks = (phrase.strip() for line in lines for phrase in line.split("  "))
+        return "\n".join(chunk for chunk in chunks if chunk)
+
+    @staticmethod
+    def _get_content_from_url(soup: BeautifulSoup) -> str:
         """
         从BeautifulSoup对象中提取内容
 
@@ -214,6 +310,94 @@ def scrape_urls(urls: List[str], cfg: Any) -> List[Dict[str, Any]]:
     return scraper.run()
 
 
+class AsyncScraper:
+    """基于 aiohttp 的异步网页抓取器，多个子查询可共享同一会话与并发限制"""
+
+    def __init__(self, cfg: Any):
+        """
+        初始化异步抓取器
+
+        :param cfg: 配置对象
+        """
+        self.cfg = cfg
+        self.session: Optional[aiohttp.ClientSession] = None
+        self.semaphore = asyncio.Semaphore(cfg.max_concurrent_scrapes)
+        self.host_semaphores = defaultdict(
+            lambda: asyncio.Semaphore(cfg.max_scrapes_per_host)
+        )
+        # 同一次研究中多个子查询常命中相同URL，每个URL只抓取一次
+        self._tasks: Dict[str, asyncio.Task] = {}
+
+    async def __aenter__(self) -> "AsyncScraper":
+        self.session = aiohttp.ClientSession(
+            headers={"User-Agent": self.cfg.user_agent},
+            timeout=aiohttp.ClientTimeout(total=self.cfg.scrape_timeout),
+        )
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.session.close()
+        self.session = None
+
+    async def run(self, urls: List[str]) -> List[Dict[str, Any]]:
+        """
+        并发抓取多个URL
+
+        :param urls: 要抓取的URL列表
+        :return: 抓取结果列表
+        """
+        for url in urls:
+            if url not in self._tasks:
+                self._tasks[url] = asyncio.ensure_future(
+                    self._extract_data_from_link(url)
+                )
+        contents = await asyncio.gather(
+            *[self._tasks[url] for url in dict.fromkeys(urls)]
+        )
+        return [content for content in contents if content["raw_content"] is not None]
+
+    async def _extract_data_from_link(self, link: str) -> Dict[str, Any]:
+        """
+        从链接中提取数据，同一主机的并发请求数受限
+
+        :param link: 要抓取的URL
+        :return: 包含抓取结果的字典
+        """
+        try:
+            async with self.semaphore, self.host_semaphores[urlparse(link).netloc]:
+                async with self.session.get(link) as response:
+                    body = await response.read()
+                    encoding = response.charset
+            # HTML 解析是 CPU 密集操作，放到线程中执行以免阻塞事件循环
+            content = await asyncio.to_thread(
+                BeautifulSoupScraper.extract_text, body, encoding
+            )
+
+            if len(content) < 100:
+                return {"url": link, "raw_content": None}
+            return {"url": link, "raw_content": content}
+        except Exception as e:
+            print(f"从 {link} 提取数据时出错: {str(e)}")
+            return {"url": link, "raw_content": None}
+
+
+async def ascrape_urls(
+    urls: List[str], cfg: Any, scraper: Optional[AsyncScraper] = None
+) -> List[Dict[str, Any]]:
+    """
+    异步抓取多个URL
+
+    :param urls: 要抓取的URL列表
+    :param cfg: 配置对象
+    :param scraper: 共享的异步抓取器（可选），未提供时临时创建
+    :return: 抓取结果列表
+    """
+    if scraper is not None:
+        return await scraper.run(urls)
+    async with AsyncScraper(cfg) as scraper:
+        return await scraper.run(urls)
+
+
 class SearchAPIRetriever(BaseRetriever):
     """搜索API检索器"""
 
@@ -246,6 +430,8 @@ class ContextCompressor:
         documents: List[Dict[str, Any]],
         embeddings: Any,
         max_results: int = 5,
+        precomputed_embeddings: Optional[List[List[float]]] = None,
+        precision: str = "int8",
         **kwargs,
     ):
         """
@@ -254,13 +440,71 @@ class ContextCompressor:
         :param documents: 文档列表
         :param embeddings: 嵌入模型
         :param max_results: 最大结果数
+        :param precomputed_embeddings: 与 get_chunks() 一一对应的预计算文本块向量（可选）
+        :param precision: 预计算向量的存储精度（"float32"、"int8" 或 "binary"）
         :param kwargs: 其他参数
         """
         self.max_results = max_results
         self.documents = documents
         self.kwargs = kwargs
         self.embeddings = embeddings
+        self.precomputed_embeddings = precomputed_embeddings
+        self.precision = precision
         self.similarity_threshold = float(os.environ.get("SIMILARITY_THRESHOLD", 0.38))
+        self._chunks: Optional[List[Document]] = None
+        self._store: Optional[QuantizedEmbeddingStore] = None
+
+    @classmethod
+    def from_chunks(
+        cls,
+        chunks: List[Document],
+        embeddings: Any,
+        precomputed_embeddings: List[List[float]],
+        **kwargs,
+    ) -> "ContextCompressor":
+        """
+        使用已分割的文本块及其向量创建上下文压缩器
+
+        :param chunks: 文本块列表
+        :param embeddings: 嵌入模型
+        :param precomputed_embeddings: 与文本块一一对应的向量
+        :param kwargs: 其他参数
+        :return: 上下文压缩器
+        """
+        compressor = cls(
+            [], embeddings, precomputed_embeddings=precomputed_embeddings, **kwargs
+        )
+        compressor._chunks = chunks
+        return compressor
+
+    def get_text_splitter(self) -> RecursiveCharacterTextSplitter:
+        """
+        获取文本分割器
+
+        :return: 文本分割器
+        """
+        return RecursiveCharacterTextSplitter(chunk_size=500, chunk_overlap=100)
+
+    def get_chunks(self) -> List[Document]:
+        """
+        获取分割后的文本块，结果会被缓存
+
+        :return: 文本块列表
+        """
+        if self._chunks is None:
+            self._chunks = self.split_documents(self.documents)
+        return self._chunks
+
+    def split_documents(self, documents: List[Dict[str, Any]]) -> List[Document]:
+        """
+        将抓取的网页内容分割为文本块
+
+        :param documents: 文档列表
+        :return: 文本块列表
+        """
+        base_retriever = SearchAPIRetriever()
+        base_retriever.pages = documents
+        return self.get_text_splitter().split_documents(base_retriever.invoke(""))
 
     def get_contextual_retriever(self) -> ContextualCompressionRetriever:
         """
@@ -268,7 +512,7 @@ class ContextCompressor:
 
         :return: 上下文压缩检索器
         """
-        splitter = RecursiveCharacterTextSplitter(chunk_size=500, chunk_overlap=100)
+        splitter = self.get_text_splitter()
         relevance_filter = EmbeddingsFilter(
             embeddings=self.embeddings, similarity_threshold=self.similarity_threshold
         )
@@ -281,6 +525,51 @@ class ContextCompressor:
             base_compressor=pipeline_compressor, base_retriever=base_retriever
         )
 
+    def get_store(self) -> QuantizedEmbeddingStore:
+        """
+        获取文本块向量索引，首次访问时由预计算向量构建
+
+        :return: 向量索引
+        """
+        if self._store is None:
+            self._store = QuantizedEmbeddingStore(self.precision)
+            self._store.add(self.precomputed_embeddings or [])
+        return self._store
+
+    def add_documents(
+        self, chunks: List[Document], embeddings: List[List[float]]
+    ) -> None:
+        """
+        追加已分割的文本块及其向量，供抓取结果陆续到达时增量建立索引
+
+        :param chunks: 文本块列表
+        :param embeddings: 与文本块一一对应的向量
+        """
+        self.get_store().add(embeddings)
+        self.get_chunks().extend(chunks)
+
+    async def filter_precomputed(
+        self, query: str, max_results: Optional[int] = None
+    ) -> List[Document]:
+        """
+        使用预计算的文本块向量过滤相关文档
+
+        :param query: 查询字符串
+        :param max_results: 需要的结果数（二值精度下决定精确重排的数量），默认使用 self.max_results
+        :return: 相似度超过阈值的文本块列表，按相似度从高到低排列
+        """
+        chunks = self.get_chunks()
+        if not chunks:
+            return []
+
+        store = self.get_store()
+        query_vector = await asyncio.to_thread(self.embeddings.embed_query, query)
+        similarity = store.similarity(
+            query_vector, top_k=max_results or self.max_results
+        )
+        order = np.argsort(-similarity, kind="stable")
+        return [chunks[i] for i in order if similarity[i] > self.similarity_threshold]
+
     def pretty_print_docs(self, docs: List[Document], top_n: int) -> str:
         """
         美化打印文档
@@ -305,6 +594,9 @@ class ContextCompressor:
         :param max_results: 最大结果数
         :return: 压缩后的上下文字符串
         """
-        compressed_docs = self.get_contextual_retriever()
-        relevant_docs = compressed_docs.invoke(query)
+        if self.precomputed_embeddings is not None or self._store is not None:
+            relevant_docs = await self.filter_precomputed(query, max_results)
+        else:
+            compressed_docs = self.get_contextual_retriever()
+            relevant_docs = compressed_docs.invoke(query)
         return self.pretty_print_docs(relevant_docs, max_results)
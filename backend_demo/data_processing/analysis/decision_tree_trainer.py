@@ -1,18 +1,41 @@
 import pandas as pd
 import numpy as np
+from joblib import Memory
 from sklearn.tree import DecisionTreeClassifier, DecisionTreeRegressor
 from sklearn.pipeline import Pipeline
-from sklearn.model_selection import GridSearchCV
-from typing import List, Dict, Any, Tuple
+from sklearn.experimental import enable_halving_search_cv  # noqa: F401
+from sklearn.model_selection import (
+    HalvingGridSearchCV,
+    KFold,
+    StratifiedKFold,
+)
+from sklearn.base import clone
+from sklearn.metrics import get_scorer
+import optuna
+from optuna.pruners import MedianPruner
+from optuna.samplers import TPESampler
+from typing import List, Dict, Any, Optional, Tuple
 import logging
 
 from backend_demo.data_processing.analysis.model_utils import (
+    PIPELINE_CACHE_BYTES_LIMIT,
+    PIPELINE_CACHE_DIR,
     BaseModel,
     create_preprocessor,
     evaluate_model,
     get_feature_importance,
+    get_study_name,
+    run_study,
+    to_float32,
 )
 
+# 取值跨越数量级的整数参数在对数尺度上搜索，小值附近采样更密
+LOG_SCALE_PARAMS = {
+    "classifier__min_samples_split",
+    "classifier__min_samples_leaf",
+    "classifier__max_leaf_nodes",
+}
+
 
 class DecisionTreeModel(BaseModel):
     """决策树模型类"""
@@ -30,8 +53,8 @@ class DecisionTreeModel(BaseModel):
         categorical_cols: List[str],
         numerical_cols: List[str],
         param_grid: Dict[str, Any],
-        n_trials: int,
-    ) -> Tuple[Pipeline, Dict[str, Any], float, None]:
+        n_trials: Optional[int],
+    ) -> Tuple[Pipeline, Dict[str, Any], float, Optional[int]]:
         """
         优化决策树模型参数
 
@@ -41,11 +64,11 @@ class DecisionTreeModel(BaseModel):
             categorical_cols: 分类特征列名列表
             numerical_cols: 数值特征列名列表
             param_grid: 参数网格
-            n_trials: 未使用，保留以兼容接口
+            n_trials: Optuna 优化尝试次数，为空时使用逐轮减半网格搜索
 
         Returns:
-            Tuple[Pipeline, Dict[str, Any], float, None]:
-            最佳模型pipeline, 最佳参数, 最佳得分, None（决策树不使用trials）
+            Tuple[Pipeline, Dict[str, Any], float, Optional[int]]:
+            最佳模型pipeline, 最佳参数, 最佳得分, 最佳试验次数（网格搜索时为None）
         """
         self.logger.info("开始决策树模型参数优化")
         preprocessor = create_preprocessor(
@@ -53,6 +76,7 @@ class DecisionTreeModel(BaseModel):
             numerical_cols,
             self.numeric_preprocessor,
             self.categorical_preprocessor,
+            high_cardinality_cols=self.high_cardinality_cols,
         )
 
         if self.problem_type == "classification":
@@ -62,21 +86,179 @@ class DecisionTreeModel(BaseModel):
             dt = DecisionTreeRegressor(random_state=42)
             scoring = "neg_mean_squared_error"
 
-        pipeline = Pipeline(steps=[("preprocessor", preprocessor), ("classifier", dt)])
+        pipeline = Pipeline(
+            steps=[("preprocessor", preprocessor), ("classifier", dt)],
+            memory=Memory(location=PIPELINE_CACHE_DIR, verbose=0),
+        )
+
+        if n_trials:
+            return self._optimize_with_optuna(
+                pipeline, X_train, y_train, param_grid, scoring, n_trials
+            )
 
-        grid_search = GridSearchCV(
-            pipeline, param_grid, cv=5, scoring=scoring, n_jobs=-1
+        # 逐轮减半：先在小样本上评估全部参数组合，只保留前 1/3 进入下一轮
+        grid_search = HalvingGridSearchCV(
+            pipeline,
+            param_grid,
+            cv=5,
+            scoring=scoring,
+            n_jobs=self.n_jobs,
+            factor=3,
+            resource="n_samples",
+            random_state=42,
         )
         grid_search.fit(X_train, y_train)
+        pipeline.memory.reduce_size(bytes_limit=PIPELINE_CACHE_BYTES_LIMIT)
+        # 保存的模型不应依赖本地缓存目录
+        best_pipeline = grid_search.best_estimator_.set_params(memory=None)
 
         self.logger.info(f"决策树模型参数优化完成。最佳得分: {grid_search.best_score_}")
         return (
-            grid_search.best_estimator_,
+            best_pipeline,
             grid_search.best_params_,
             grid_search.best_score_,
-            None,  # 决策树使用网格搜索，没有 trial 的概念
+            None,  # 决策树使用减半网格搜索，没有 trial 的概念
+        )
+
+    def _optimize_with_optuna(
+        self,
+        pipeline: Pipeline,
+        X_train: pd.DataFrame,
+        y_train: pd.Series,
+        param_grid: Dict[str, Any],
+        scoring: str,
+        n_trials: int,
+    ) -> Tuple[Pipeline, Dict[str, Any], float, int]:
+        """
+        使用 Optuna TPE 在参数网格内搜索，并按折剪枝表现不佳的试验
+
+        Args:
+            pipeline: 待优化的模型pipeline
+            X_train: 训练特征
+            y_train: 训练标签
+            param_grid: 参数网格，数值参数以候选值的最小值与最大值作为搜索区间
+            scoring: 评分指标
+            n_trials: 优化尝试次数
+
+        Returns:
+            Tuple[Pipeline, Dict[str, Any], float, int]:
+            最佳模型pipeline, 最佳参数, 最佳得分, 最佳试验次数
+        """
+        scorer = get_scorer(scoring)
+        if self.problem_type == "classification":
+            cv = StratifiedKFold(n_splits=5, shuffle=True, random_state=42)
+        else:
+            cv = KFold(n_splits=5, shuffle=True, random_state=42)
+        # 预处理器与超参数无关，在进入 Optuna 循环前为每折拟合一次并缓存变换结果，
+        # 试验内只训练决策树本身
+        preprocessor = pipeline.named_steps["preprocessor"]
+        estimator = pipeline.named_steps["classifier"]
+        y_train_values = np.asarray(y_train)
+        folds = []
+        for train_idx, val_idx in cv.split(X_train, y_train_values):
+            fold_preprocessor = clone(preprocessor)
+            folds.append(
+                (
+                    to_float32(
+                        fold_preprocessor.fit_transform(X_train.iloc[train_idx])
+                    ),
+                    to_float32(fold_preprocessor.transform(X_train.iloc[val_idx])),
+                    y_train_values[train_idx],
+                    y_train_values[val_idx],
+                )
+            )
+
+        def objective(trial):
+            params = self._suggest_params(trial, param_grid)
+            model = clone(estimator).set_params(
+                **{
+                    name.removeprefix("classifier__"): value
+                    for name, value in params.items()
+                }
+            )
+            scores = []
+            for fold_idx, fold in enumerate(folds):
+                X_fold_train, X_fold_val, y_fold_train, y_fold_val = fold
+                model.fit(X_fold_train, y_fold_train)
+                scores.append(scorer(model, X_fold_val, y_fold_val))
+                trial.report(np.mean(scores), fold_idx)
+                if trial.should_prune():
+                    raise optuna.TrialPruned()
+            return np.mean(scores)
+
+        study_name = get_study_name(
+            "dt",
+            X_train,
+            y_train,
+            {
+                "problem_type": self.problem_type,
+                "param_grid": param_grid,
+                # 搜索空间由离散候选值改为整数区间，不能续用旧研究中的试验
+                "search_space": "int_range",
+                "columns": list(X_train.columns),
+                "numeric_preprocessor": self.numeric_preprocessor,
+                "categorical_preprocessor": self.categorical_preprocessor,
+            },
+        )
+        # 单棵决策树只用一个线程且逐折训练，并行放在 trial 这一层
+        study = run_study(
+            study_name,
+            objective,
+            n_trials,
+            n_jobs=self.n_jobs,
+            sampler=TPESampler(multivariate=True, group=True, seed=42),
+            pruner=MedianPruner(n_warmup_steps=2),
         )
 
+        # 在最佳试验上重放采样，把“不限制”标记还原为 None，得到 pipeline 参数
+        best_params = self._suggest_params(study.best_trial, param_grid)
+        best_pipeline = clone(pipeline).set_params(memory=None, **best_params)
+        best_pipeline.fit(X_train, y_train)
+        best_score = study.best_value
+        best_trial = study.best_trial.number + 1
+
+        self.logger.info(f"决策树模型参数优化完成。最佳得分: {best_score}")
+        return best_pipeline, best_params, best_score, best_trial
+
+    @staticmethod
+    def _suggest_params(trial: Any, param_grid: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        根据参数网格为试验采样 pipeline 参数
+
+        整数参数在网格的最小值与最大值之间用 suggest_int 采样，使 TPE 能利用取值的大小顺序；
+        网格含 None（不限制）时，用单独的类别型标记决定是否取 None；
+        其他参数（如字符串）仍按候选值作为类别型搜索空间
+
+        Args:
+            trial: Optuna 试验（或已完成的试验，用于还原参数）
+            param_grid: 参数网格
+
+        Returns:
+            Dict[str, Any]: pipeline 参数
+        """
+        params = {}
+        for name, values in param_grid.items():
+            bounded = [value for value in values if value is not None]
+            is_int = all(
+                isinstance(value, (int, np.integer)) and not isinstance(value, bool)
+                for value in bounded
+            )
+            if not bounded or not is_int:
+                params[name] = trial.suggest_categorical(name, values)
+                continue
+            if len(bounded) < len(values) and trial.suggest_categorical(
+                f"{name}_unlimited", [False, True]
+            ):
+                params[name] = None
+                continue
+            params[name] = trial.suggest_int(
+                name,
+                int(min(bounded)),
+                int(max(bounded)),
+                log=name in LOG_SCALE_PARAMS and min(bounded) >= 1,
+            )
+        return params
+
     def train(
         self,
         X_train: pd.DataFrame,
@@ -84,7 +266,7 @@ class DecisionTreeModel(BaseModel):
         categorical_cols: List[str],
         numerical_cols: List[str],
         param_ranges: Dict[str, Any] = None,
-        n_trials: int = 100,
+        n_trials: Optional[int] = None,
         numeric_preprocessor: str = "StandardScaler",
         categorical_preprocessor: str = "OneHotEncoder",
     ) -> Dict[str, Any]:
@@ -97,7 +279,7 @@ class DecisionTreeModel(BaseModel):
             categorical_cols: 分类特征列名列表
             numerical_cols: 数值特征列名列表
             param_ranges: 参数范围（对于决策树，这是参数网格）
-            n_trials: 未使用，保留以兼容接口
+            n_trials: Optuna 优化尝试次数，为空时使用逐轮减半网格搜索
             numeric_preprocessor: 数值特征预处理方法
             categorical_preprocessor: 分类特征预处理方法
 
@@ -121,7 +303,7 @@ class DecisionTreeModel(BaseModel):
 
         param_grid = default_param_grid
 
-        best_pipeline, best_params, cv_mean_score, _ = self.optimize(
+        best_pipeline, best_params, cv_mean_score, best_trial = self.optimize(
             X_train, y_train, categorical_cols, numerical_cols, param_grid, n_trials
         )
 
@@ -133,6 +315,8 @@ class DecisionTreeModel(BaseModel):
             "cv_mean_score": cv_mean_score,
             "best_params": best_params,
         }
+        if best_trial is not None:
+            results["best_trial"] = best_trial
 
         # 对于回归问题，CV分数是负的MSE，我们需要取其绝对值
         if self.problem_type == "regression":
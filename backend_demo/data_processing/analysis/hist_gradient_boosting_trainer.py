@@ -0,0 +1,331 @@
+import pandas as pd
+import numpy as np
+from sklearn.ensemble import (
+    HistGradientBoostingClassifier,
+    HistGradientBoostingRegressor,
+)
+from sklearn.inspection import permutation_importance
+from sklearn.model_selection import KFold, StratifiedKFold
+from sklearn.metrics import get_scorer
+from sklearn.base import clone
+from sklearn.pipeline import Pipeline
+import optuna
+from optuna.pruners import MedianPruner
+from typing import List, Dict, Any, Tuple
+import logging
+
+from backend_demo.data_processing.analysis.model_utils import (
+    BaseModel,
+    create_preprocessor,
+    create_sampler,
+    evaluate_model,
+    get_study_name,
+    run_study,
+    to_float32,
+)
+
+# 迭代轮数上限，实际轮数由早停决定
+MAX_ITER = 500
+# 置换重要性只在留出数据的子样本上计算，控制大数据集上的耗时
+IMPORTANCE_MAX_SAMPLES = 10000
+
+
+class HistGradientBoostingModel(BaseModel):
+    """直方图梯度提升模型类"""
+
+    def __init__(self, problem_type: str):
+        super().__init__(problem_type)
+        self.numeric_preprocessor = "StandardScaler"
+        self.categorical_preprocessor = "OneHotEncoder"
+        self.feature_importance = None
+        self.logger = logging.getLogger(__name__)
+
+    def _create_estimator(self, params: Dict[str, Any]) -> Any:
+        """
+        创建带早停的直方图梯度提升估计器
+
+        Args:
+            params: 模型参数
+
+        Returns:
+            直方图梯度提升分类器或回归器
+        """
+        estimator_class = (
+            HistGradientBoostingClassifier
+            if self.problem_type == "classification"
+            else HistGradientBoostingRegressor
+        )
+        return estimator_class(
+            **params,
+            max_iter=MAX_ITER,
+            early_stopping=True,
+            validation_fraction=0.1,
+            n_iter_no_change=20,
+            random_state=42,
+        )
+
+    def optimize(
+        self,
+        X_train: pd.DataFrame,
+        y_train: pd.Series,
+        categorical_cols: List[str],
+        numerical_cols: List[str],
+        param_ranges: Dict[str, Any],
+        n_trials: int,
+    ) -> Tuple[Pipeline, Dict[str, Any], float, int]:
+        """
+        优化直方图梯度提升模型参数
+
+        Args:
+            X_train: 训练特征
+            y_train: 训练标签
+            categorical_cols: 分类特征列名列表
+            numerical_cols: 数值特征列名列表
+            param_ranges: 参数范围
+            n_trials: 优化尝试次数
+
+        Returns:
+            Tuple[Pipeline, Dict[str, Any], float, int]:
+            最佳模型pipeline, 最佳参数, 最佳得分, 最佳试验次数
+        """
+        self.logger.info("开始直方图梯度提升模型参数优化")
+        # 直方图梯度提升不接受稀疏矩阵，预处理结果统一输出为稠密矩阵
+        preprocessor = create_preprocessor(
+            categorical_cols,
+            numerical_cols,
+            self.numeric_preprocessor,
+            self.categorical_preprocessor,
+            high_cardinality_cols=self.high_cardinality_cols,
+        ).set_params(sparse_threshold=0)
+        y_train_values = np.asarray(y_train)
+
+        if self.problem_type == "classification":
+            cv = StratifiedKFold(n_splits=5)
+            # 多分类时使用一对多 ROC AUC，与 evaluate_model 和 XGBoost 的搜索一致
+            scorer = get_scorer(
+                "roc_auc_ovr" if len(np.unique(y_train_values)) > 2 else "roc_auc"
+            )
+        else:
+            cv = KFold(n_splits=5)
+            scorer = get_scorer("neg_mean_squared_error")
+
+        # 预处理器与超参数无关，每折只拟合一次
+        folds = []
+        for train_idx, val_idx in cv.split(X_train, y_train_values):
+            fold_preprocessor = clone(preprocessor)
+            folds.append(
+                (
+                    to_float32(
+                        fold_preprocessor.fit_transform(X_train.iloc[train_idx])
+                    ),
+                    to_float32(fold_preprocessor.transform(X_train.iloc[val_idx])),
+                    y_train_values[train_idx],
+                    y_train_values[val_idx],
+                )
+            )
+
+        def objective(trial):
+            params = {
+                "learning_rate": trial.suggest_float(
+                    "learning_rate",
+                    param_ranges["learning_rate"][0],
+                    param_ranges["learning_rate"][1],
+                    log=True,
+                ),
+                "max_leaf_nodes": trial.suggest_int(
+                    "max_leaf_nodes",
+                    param_ranges["max_leaf_nodes"][0],
+                    param_ranges["max_leaf_nodes"][1],
+                ),
+                "max_depth": trial.suggest_int(
+                    "max_depth",
+                    param_ranges["max_depth"][0],
+                    param_ranges["max_depth"][1],
+                ),
+                "min_samples_leaf": trial.suggest_int(
+                    "min_samples_leaf",
+                    param_ranges["min_samples_leaf"][0],
+                    param_ranges["min_samples_leaf"][1],
+                ),
+                "l2_regularization": trial.suggest_float(
+                    "l2_regularization",
+                    param_ranges["l2_regularization"][0],
+                    param_ranges["l2_regularization"][1],
+                ),
+                # 分箱数越少，直方图越小、每次分裂扫描越快，由搜索在速度与精度间取舍
+                "max_bins": trial.suggest_int(
+                    "max_bins",
+                    param_ranges["max_bins"][0],
+                    param_ranges["max_bins"][1],
+                ),
+            }
+            model = self._create_estimator(params)
+
+            scores = []
+            for fold_idx, fold in enumerate(folds):
+                X_fold_train, X_fold_val, y_fold_train, y_fold_val = fold
+                model.fit(X_fold_train, y_fold_train)
+                scores.append(scorer(model, X_fold_val, y_fold_val))
+                trial.report(np.mean(scores), fold_idx)
+                if trial.should_prune():
+                    raise optuna.TrialPruned()
+            return np.mean(scores)
+
+        study_name = get_study_name(
+            "hgb",
+            X_train,
+            y_train,
+            {
+                "problem_type": self.problem_type,
+                "param_ranges": param_ranges,
+                "categorical_cols": categorical_cols,
+                "numerical_cols": numerical_cols,
+                "numeric_preprocessor": self.numeric_preprocessor,
+                "categorical_preprocessor": self.categorical_preprocessor,
+                "sampler": self.sampler_name,
+                "max_iter": MAX_ITER,
+            },
+        )
+        # 重复训练同一数据与设置时从已有试验继续，不再从头开始
+        study = run_study(
+            study_name,
+            objective,
+            n_trials,
+            sampler=create_sampler(self.sampler_name),
+            pruner=MedianPruner(n_warmup_steps=1),
+        )
+
+        best_params = study.best_params
+        best_model = self._create_estimator(best_params)
+        best_model.fit(to_float32(preprocessor.fit_transform(X_train)), y_train)
+        best_pipeline = Pipeline(
+            steps=[("preprocessor", preprocessor), ("classifier", best_model)]
+        )
+        best_score = study.best_value
+        best_trial = study.best_trial.number + 1
+
+        self.logger.info(f"直方图梯度提升模型参数优化完成。最佳得分: {best_score}")
+        return best_pipeline, best_params, best_score, best_trial
+
+    def train(
+        self,
+        X_train: pd.DataFrame,
+        y_train: pd.Series,
+        categorical_cols: List[str],
+        numerical_cols: List[str],
+        param_ranges: Dict[str, Any] = None,
+        n_trials: int = 100,
+        numeric_preprocessor: str = "StandardScaler",
+        categorical_preprocessor: str = "OneHotEncoder",
+    ) -> Dict[str, Any]:
+        """
+        训练直方图梯度提升模型
+
+        Args:
+            X_train: 训练特征
+            y_train: 训练标签
+            categorical_cols: 分类特征列名列表
+            numerical_cols: 数值特征列名列表
+            param_ranges: 参数范围
+            n_trials: 优化尝试次数
+            numeric_preprocessor: 数值特征预处理方法
+            categorical_preprocessor: 分类特征预处理方法
+
+        Returns:
+            Dict[str, Any]: 包含训练结果的字典
+        """
+        self.logger.info("开始直方图梯度提升模型训练")
+        self.numeric_preprocessor = numeric_preprocessor
+        self.categorical_preprocessor = categorical_preprocessor
+
+        default_param_ranges = {
+            "learning_rate": (0.01, 0.3),
+            "max_leaf_nodes": (15, 127),
+            "max_depth": (3, 15),
+            "min_samples_leaf": (5, 100),
+            "l2_regularization": (0.0, 10.0),
+            "max_bins": (63, 255),
+        }
+        if param_ranges:
+            default_param_ranges.update(param_ranges)
+        param_ranges = default_param_ranges
+
+        best_pipeline, best_params, cv_mean_score, best_trial = self.optimize(
+            X_train, y_train, categorical_cols, numerical_cols, param_ranges, n_trials
+        )
+
+        self.model = best_pipeline
+        # 置换重要性在模型未见过的测试集上计算，避免高估模型记住的特征；
+        # 没有划分测试集时只能退回训练集
+        if self.holdout_data is not None:
+            X_importance, y_importance = self.holdout_data
+        else:
+            X_importance, y_importance = X_train, y_train
+        self.feature_importance = self._compute_feature_importance(
+            X_importance, y_importance
+        )
+
+        results = {
+            "model": self.model,
+            "feature_importance": self.get_feature_importance(),
+            "cv_mean_score": cv_mean_score,
+            "best_params": best_params,
+            "best_trial": best_trial,
+        }
+
+        if self.problem_type == "regression":
+            results["cv_mean_score"] = abs(results["cv_mean_score"])
+
+        self.logger.info("直方图梯度提升模型训练完成")
+        return results
+
+    def _compute_feature_importance(self, X: pd.DataFrame, y: pd.Series) -> pd.Series:
+        """
+        计算置换特征重要性（直方图梯度提升没有 feature_importances_ 属性）
+
+        Args:
+            X: 用于计算重要性的特征，应为模型未见过的留出数据
+            y: 对应的标签
+
+        Returns:
+            pd.Series: 按重要性降序排列的特征重要性
+        """
+        if len(X) > IMPORTANCE_MAX_SAMPLES:
+            X = X.sample(n=IMPORTANCE_MAX_SAMPLES, random_state=42)
+            y = y.loc[X.index]
+
+        preprocessor = self.model.named_steps["preprocessor"]
+        importance = permutation_importance(
+            self.model.named_steps["classifier"],
+            to_float32(preprocessor.transform(X)),
+            np.asarray(y),
+            n_repeats=5,
+            random_state=42,
+        )
+        importances = importance.importances_mean
+        feature_names = preprocessor.get_feature_names_out()
+        order = np.argsort(-importances, kind="stable")
+        return pd.Series(importances[order], index=feature_names[order])
+
+    def evaluate(self, X_test: pd.DataFrame, y_test: pd.Series) -> Dict[str, Any]:
+        """
+        评估直方图梯度提升模型性能
+
+        Args:
+            X_test: 测试特征
+            y_test: 测试标签
+
+        Returns:
+            Dict[str, Any]: 包含评估指标的字典
+        """
+        self.logger.info("开始直方图梯度提升模型评估")
+        return evaluate_model(self.model, X_test, y_test, self.problem_type)
+
+    def get_feature_importance(self) -> pd.Series:
+        """
+        获取特征重要性
+
+        Returns:
+            pd.Series: 特征重要性
+        """
+        return self.feature_importance
@@ -16,6 +16,9 @@ from backend_demo.data_processing.analysis.model_utils import (
 class LinearRegressionModel(BaseModel):
     """线性回归模型类"""
 
+    # 最小二乘求解对精度敏感，线性回归保留 float64
+    feature_dtype = np.float64
+
     def __init__(self, problem_type: str):
         super().__init__(problem_type)
         self.logger = logging.getLogger(__name__)
@@ -75,19 +78,23 @@ class LinearRegressionModel(BaseModel):
             numerical_cols,
             self.numeric_preprocessor,
             self.categorical_preprocessor,
+            high_cardinality_cols=self.high_cardinality_cols,
+            dtype=self.feature_dtype,
         )
-        model = LinearRegression()
+        # 在全部训练数据上拟合模型，预处理结果同时用于计算训练集指标
+        X_train_processed = preprocessor.fit_transform(X_train)
+        model = LinearRegression().fit(X_train_processed, y_train)
         self.model = Pipeline(
             steps=[("preprocessor", preprocessor), ("regressor", model)]
         )
 
-        # 在全部训练数据上拟合模型
-        self.model.fit(X_train, y_train)
-
         # 计算训练集 MSE 和 R²
-        y_train_pred = self.model.predict(X_train)
-        train_mse = np.mean((y_train - y_train_pred) ** 2)
-        train_r2 = self.model.score(X_train, y_train)
+        y_true = np.asarray(y_train, dtype=float)
+        residuals = y_true - model.predict(X_train_processed)
+        ss_res = np.dot(residuals, residuals)
+        ss_tot = np.sum((y_true - y_true.mean()) ** 2)
+        train_mse = ss_res / len(y_true)
+        train_r2 = 1 - ss_res / ss_tot
 
         self.logger.info(f"训练 MSE: {train_mse}, R²: {train_r2}")
 
@@ -1,15 +1,19 @@
 import streamlit as st
 import numpy as np
+from math import prod
+
+# 网格搜索需要评估全部组合，超过该规模的参数网格直接拒绝
+MAX_GRID_SIZE = 10_000_000
+# 训练数据超过该行数时默认选择直方图梯度提升，其分箱训练在大数据上明显快于随机森林
+LARGE_DATASET_ROWS = 50000
 
 
 def display_info_message():
-    st.info(
-        """
+    st.info("""
     本工具支持数据导入、特征工程、模型训练、性能评估和预测分析。
     您可以选择多种机器学习算法,调整参数,比较模型效果,并应用于新数据预测。
     适用于分类和回归问题,助您快速构建高效的预测模型。
-    """
-    )
+    """)
 
 
 def display_data_split_settings():
@@ -30,23 +34,23 @@ def display_data_split_settings():
             if "confirmed_test_size" not in st.session_state:
                 st.session_state.confirmed_test_size = 0.3
 
-            # 滑块用于调整test_size
-            new_test_size = st.slider(
-                "测试集比例",
-                min_value=0.1,
-                max_value=0.5,
-                value=st.session_state.current_test_size,
-                step=0.05,
-                help="设置用于测试的数据比例。推荐范围：0.2 - 0.3",
-            )
-
-            # 更新当前的test_size值
-            st.session_state.current_test_size = new_test_size
-
-            # 添加确认按钮
-            if st.button("确认数据划分设置"):
-                st.session_state.confirmed_test_size = new_test_size
-                st.success(f"数据划分设置已更新。测试集比例：{new_test_size:.2f}")
+            # 表单内的控件只在提交时触发一次重跑
+            with st.form("data_split_settings"):
+                # 滑块用于调整test_size
+                new_test_size = st.slider(
+                    "测试集比例",
+                    min_value=0.1,
+                    max_value=0.5,
+                    value=st.session_state.current_test_size,
+                    step=0.05,
+                    help="设置用于测试的数据比例。推荐范围：0.2 - 0.3",
+                )
+
+                # 添加确认按钮
+                if st.form_submit_button("确认数据划分设置"):
+                    st.session_state.current_test_size = new_test_size
+                    st.session_state.confirmed_test_size = new_test_size
+                    st.success(f"数据划分设置已更新。测试集比例：{new_test_size:.2f}")
         else:
             st.info("已选择使用全部数据进行训练，不划分测试集。")
 
@@ -60,82 +64,104 @@ def display_preprocessing_settings():
     with st.expander("数据预处理设置", expanded=False):
         st.markdown("#### 特征预处理方法选择")
 
+        with st.form("preprocessing_settings"):
+            col1, col2 = st.columns(2)
+            with col1:
+                numeric_preprocessor = st.selectbox(
+                    "数值特征预处理方法",
+                    options=["StandardScaler", "passthrough"],
+                    index=(
+                        0
+                        if st.session_state.numeric_preprocessor == "StandardScaler"
+                        else 1
+                    ),
+                    help="StandardScaler: 标准化数值特征\npassthrough: 不对数值特征进行处理",
+                )
+            with col2:
+                categorical_preprocessor = st.selectbox(
+                    "分类特征预处理方法",
+                    options=["OneHotEncoder", "OrdinalEncoder", "passthrough"],
+                    index=["OneHotEncoder", "OrdinalEncoder", "passthrough"].index(
+                        st.session_state.categorical_preprocessor
+                    ),
+                    help="OneHotEncoder: 独热编码\nOrdinalEncoder: 序数编码\npassthrough: 不对分类特征进行处理",
+                )
+
+            submitted = st.form_submit_button("确认预处理设置")
+
+        if submitted:
+            st.session_state.numeric_preprocessor = numeric_preprocessor
+            st.session_state.categorical_preprocessor = categorical_preprocessor
+            st.success(
+                f"预处理设置已更新。数值特征: {st.session_state.numeric_preprocessor}, 分类特征: {st.session_state.categorical_preprocessor}"
+            )
+
+
+def display_sampler_selection():
+    sampler_options = {"tpe": "TPE", "cmaes": "CMA-ES"}
+    st.session_state.optuna_sampler = st.radio(
+        "参数搜索采样器",
+        options=list(sampler_options),
+        format_func=sampler_options.get,
+        index=list(sampler_options).index(st.session_state.optuna_sampler),
+        horizontal=True,
+        help="TPE: 适用于各类参数空间\nCMA-ES: 利用数值参数之间的相关性，前 20 次试验随机探索，适合试验次数较多的搜索（需安装 cmaes）",
+    )
+
+
+def display_random_forest_settings():
+    st.markdown("#### 随机森林超参数设置")
+    with st.form("rf_settings"):
         col1, col2 = st.columns(2)
         with col1:
-            st.session_state.numeric_preprocessor = st.selectbox(
-                "数值特征预处理方法",
-                options=["StandardScaler", "passthrough"],
-                index=(
-                    0
-                    if st.session_state.numeric_preprocessor == "StandardScaler"
-                    else 1
-                ),
-                help="StandardScaler: 标准化数值特征\npassthrough: 不对数值特征进行处理",
+            n_estimators_range = st.slider(
+                "n_estimators 范围",
+                min_value=10,
+                max_value=500,
+                value=st.session_state.rf_param_grid["n_estimators"],
+                step=10,
+            )
+            max_depth_range = st.slider(
+                "max_depth 范围",
+                min_value=1,
+                max_value=50,
+                value=st.session_state.rf_param_grid["max_depth"],
             )
         with col2:
-            st.session_state.categorical_preprocessor = st.selectbox(
-                "分类特征预处理方法",
-                options=["OneHotEncoder", "OrdinalEncoder", "passthrough"],
-                index=["OneHotEncoder", "OrdinalEncoder", "passthrough"].index(
-                    st.session_state.categorical_preprocessor
-                ),
-                help="OneHotEncoder: 独热编码\nOrdinalEncoder: 序数编码\npassthrough: 不对分类特征进行处理",
+            min_samples_split_range = st.slider(
+                "min_samples_split 范围",
+                min_value=2,
+                max_value=30,
+                value=st.session_state.rf_param_grid["min_samples_split"],
             )
-
-        if st.button("确认预处理设置"):
-            st.success(
-                f"预处理设置已更新。数值特征: {st.session_state.numeric_preprocessor}, 分类特征: {st.session_state.categorical_preprocessor}"
+            min_samples_leaf_range = st.slider(
+                "min_samples_leaf 范围",
+                min_value=1,
+                max_value=30,
+                value=st.session_state.rf_param_grid["min_samples_leaf"],
             )
 
+        max_features_options = st.multiselect(
+            "max_features 选项",
+            options=["sqrt", "log2"]
+            + list(range(1, len(st.session_state.feature_columns) + 1)),
+            default=st.session_state.rf_param_grid["max_features"],
+        )
 
-def display_random_forest_settings():
-    st.markdown("#### 随机森林超参数设置")
-    col1, col2 = st.columns(2)
-    with col1:
-        n_estimators_range = st.slider(
-            "n_estimators 范围",
-            min_value=10,
+        st.session_state.rf_n_trials = st.slider(
+            "优化迭代次数 (n_trials)",
+            min_value=50,
             max_value=500,
-            value=st.session_state.rf_param_grid["n_estimators"],
+            value=st.session_state.rf_n_trials,
             step=10,
-        )
-        max_depth_range = st.slider(
-            "max_depth 范围",
-            min_value=1,
-            max_value=50,
-            value=st.session_state.rf_param_grid["max_depth"],
-        )
-    with col2:
-        min_samples_split_range = st.slider(
-            "min_samples_split 范围",
-            min_value=2,
-            max_value=30,
-            value=st.session_state.rf_param_grid["min_samples_split"],
-        )
-        min_samples_leaf_range = st.slider(
-            "min_samples_leaf 范围",
-            min_value=1,
-            max_value=30,
-            value=st.session_state.rf_param_grid["min_samples_leaf"],
+            help="增加迭代次数可能提高模型性能，但会显著增加训练时间。",
         )
 
-    max_features_options = st.multiselect(
-        "max_features 选项",
-        options=["sqrt", "log2"]
-        + list(range(1, len(st.session_state.feature_columns) + 1)),
-        default=st.session_state.rf_param_grid["max_features"],
-    )
+        display_sampler_selection()
 
-    st.session_state.rf_n_trials = st.slider(
-        "优化迭代次数 (n_trials)",
-        min_value=50,
-        max_value=500,
-        value=st.session_state.rf_n_trials,
-        step=10,
-        help="增加迭代次数可能提高模型性能，但会显著增加训练时间。",
-    )
+        submitted = st.form_submit_button("确认随机森林参数设置")
 
-    if st.button("确认随机森林参数设置"):
+    if submitted:
         st.session_state.rf_param_grid = {
             "n_estimators": n_estimators_range,
             "max_depth": max_depth_range,
@@ -153,15 +179,11 @@ def display_decision_tree_settings():
     st.markdown("#### 决策树超参数设置")
 
     def create_param_range(param_name, default_values):
-        non_none_values = [v for v in default_values if v is not None]
-        min_val, max_val = min(non_none_values), max(non_none_values)
-        step = min(
-            set(
-                non_none_values[i + 1] - non_none_values[i]
-                for i in range(len(non_none_values) - 1)
-            ),
-            default=1,
-        )
+        # np.unique 同时完成排序与去重，相邻差值的最小值即为默认步长
+        unique_values = np.unique([v for v in default_values if v is not None])
+        min_val, max_val = int(unique_values[0]), int(unique_values[-1])
+        diffs = np.diff(unique_values)
+        step = int(diffs.min()) if diffs.size else 1
 
         col1, col2, col3, col4 = st.columns([3, 3, 3, 2])
         with col1:
@@ -177,25 +199,54 @@ def display_decision_tree_settings():
                 "包含None", key=f"{param_name}_none", value=None in default_values
             )
 
-        values = list(range(int(start), int(end) + int(custom_step), int(custom_step)))
+        values = np.arange(
+            int(start), int(end) + int(custom_step), int(custom_step)
+        ).tolist()
         if include_none:
             values.append(None)
 
         return values
 
-    default_params = st.session_state.dt_param_grid
-    max_depth = create_param_range("max_depth", default_params["classifier__max_depth"])
-    min_samples_split = create_param_range(
-        "min_samples_split", default_params["classifier__min_samples_split"]
+    # 优化方法决定是否显示 n_trials，需要即时生效，因此放在表单之外
+    optimizer = st.radio(
+        "参数优化方法",
+        options=["逐轮减半网格搜索", "Optuna"],
+        index=0 if st.session_state.dt_optimizer == "grid" else 1,
+        horizontal=True,
+        help="逐轮减半网格搜索会评估全部参数组合；Optuna 在各参数的最小值与最大值之间按贝叶斯优化采样，并提前剪枝表现不佳的试验，参数空间较大时更快。",
     )
-    min_samples_leaf = create_param_range(
-        "min_samples_leaf", default_params["classifier__min_samples_leaf"]
-    )
-    max_leaf_nodes = create_param_range(
-        "max_leaf_nodes", default_params["classifier__max_leaf_nodes"]
+    st.session_state.dt_optimizer = (
+        "grid" if optimizer == "逐轮减半网格搜索" else "optuna"
     )
 
-    if st.button("确认决策树参数设置"):
+    with st.form("dt_settings"):
+        default_params = st.session_state.dt_param_grid
+        max_depth = create_param_range(
+            "max_depth", default_params["classifier__max_depth"]
+        )
+        min_samples_split = create_param_range(
+            "min_samples_split", default_params["classifier__min_samples_split"]
+        )
+        min_samples_leaf = create_param_range(
+            "min_samples_leaf", default_params["classifier__min_samples_leaf"]
+        )
+        max_leaf_nodes = create_param_range(
+            "max_leaf_nodes", default_params["classifier__max_leaf_nodes"]
+        )
+
+        if st.session_state.dt_optimizer == "optuna":
+            st.session_state.dt_n_trials = st.slider(
+                "优化迭代次数 (n_trials)",
+                min_value=20,
+                max_value=500,
+                value=st.session_state.dt_n_trials,
+                step=10,
+                help="增加迭代次数可能提高模型性能，但会增加训练时间。",
+            )
+
+        submitted = st.form_submit_button("确认决策树参数设置")
+
+    if submitted:
         new_param_grid = {
             "classifier__max_depth": max_depth,
             "classifier__min_samples_split": min_samples_split,
@@ -203,8 +254,15 @@ def display_decision_tree_settings():
             "classifier__max_leaf_nodes": max_leaf_nodes,
         }
 
-        # 计算参数空间大小
-        param_space_size = np.prod([len(v) for v in new_param_grid.values()])
+        # 计算参数空间大小（Python 整数不会溢出）
+        param_space_size = prod(len(v) for v in new_param_grid.values())
+
+        # Optuna 在参数区间内采样，不受组合总数限制
+        if st.session_state.dt_optimizer == "grid" and param_space_size > MAX_GRID_SIZE:
+            st.error(
+                f"参数空间过大（{param_space_size:,} 种组合），已拒绝本次设置。请减少参数范围或增加步长，或改用 Optuna。"
+            )
+            return
 
         st.session_state.dt_param_grid = new_param_grid
         st.success(
@@ -220,60 +278,65 @@ def display_decision_tree_settings():
 
 def display_xgboost_settings():
     st.markdown("#### XGBoost超参数设置")
-    col1, col2 = st.columns(2)
-    with col1:
-        n_estimators_range = st.slider(
-            "n_estimators 范围",
-            min_value=50,
-            max_value=1000,
-            value=st.session_state.xgb_param_ranges["n_estimators"],
+    with st.form("xgb_settings"):
+        col1, col2 = st.columns(2)
+        with col1:
+            n_estimators_range = st.slider(
+                "n_estimators 范围",
+                min_value=50,
+                max_value=1000,
+                value=st.session_state.xgb_param_ranges["n_estimators"],
+                step=50,
+            )
+            max_depth_range = st.slider(
+                "max_depth 范围",
+                min_value=1,
+                max_value=15,
+                value=st.session_state.xgb_param_ranges["max_depth"],
+            )
+            learning_rate_range = st.slider(
+                "learning_rate 范围",
+                min_value=0.01,
+                max_value=1.0,
+                value=st.session_state.xgb_param_ranges["learning_rate"],
+                step=0.01,
+            )
+        with col2:
+            subsample_range = st.slider(
+                "subsample 范围",
+                min_value=0.5,
+                max_value=1.0,
+                value=st.session_state.xgb_param_ranges["subsample"],
+                step=0.1,
+            )
+            colsample_bytree_range = st.slider(
+                "colsample_bytree 范围",
+                min_value=0.5,
+                max_value=1.0,
+                value=st.session_state.xgb_param_ranges["colsample_bytree"],
+                step=0.1,
+            )
+            min_child_weight_range = st.slider(
+                "min_child_weight 范围",
+                min_value=1,
+                max_value=20,
+                value=st.session_state.xgb_param_ranges["min_child_weight"],
+            )
+
+        st.session_state.xgb_n_trials = st.slider(
+            "优化迭代次数 (n_trials)",
+            min_value=100,
+            max_value=2000,
+            value=st.session_state.xgb_n_trials,
             step=50,
-        )
-        max_depth_range = st.slider(
-            "max_depth 范围",
-            min_value=1,
-            max_value=15,
-            value=st.session_state.xgb_param_ranges["max_depth"],
-        )
-        learning_rate_range = st.slider(
-            "learning_rate 范围",
-            min_value=0.01,
-            max_value=1.0,
-            value=st.session_state.xgb_param_ranges["learning_rate"],
-            step=0.01,
-        )
-    with col2:
-        subsample_range = st.slider(
-            "subsample 范围",
-            min_value=0.5,
-            max_value=1.0,
-            value=st.session_state.xgb_param_ranges["subsample"],
-            step=0.1,
-        )
-        colsample_bytree_range = st.slider(
-            "colsample_bytree 范围",
-            min_value=0.5,
-            max_value=1.0,
-            value=st.session_state.xgb_param_ranges["colsample_bytree"],
-            step=0.1,
-        )
-        min_child_weight_range = st.slider(
-            "min_child_weight 范围",
-            min_value=1,
-            max_value=20,
-            value=st.session_state.xgb_param_ranges["min_child_weight"],
+            help="增加迭代次数可能提高模型性能，但会显著增加训练时间。",
         )
 
-    st.session_state.xgb_n_trials = st.slider(
-        "优化迭代次数 (n_trials)",
-        min_value=100,
-        max_value=2000,
-        value=st.session_state.xgb_n_trials,
-        step=50,
-        help="增加迭代次数可能提高模型性能，但会显著增加训练时间。",
-    )
+        display_sampler_selection()
+
+        submitted = st.form_submit_button("确认XGBoost参数设置")
 
-    if st.button("确认XGBoost参数设置"):
+    if submitted:
         st.session_state.xgb_param_ranges = {
             "n_estimators": n_estimators_range,
             "max_depth": max_depth_range,
@@ -283,6 +346,7 @@ def display_xgboost_settings():
             "min_child_weight": min_child_weight_range,
             "reg_alpha": st.session_state.xgb_param_ranges["reg_alpha"],
             "reg_lambda": st.session_state.xgb_param_ranges["reg_lambda"],
+            "max_bin": st.session_state.xgb_param_ranges.get("max_bin", (64, 512)),
         }
         st.success("XGBoost参数设置已更新，将在下次模型训练时使用。")
 
@@ -290,6 +354,75 @@ def display_xgboost_settings():
         st.warning("注意：设置较大的迭代次数可能会显著增加训练时间。")
 
 
+def display_hist_gradient_boosting_settings():
+    st.markdown("#### 直方图梯度提升超参数设置")
+    with st.form("hgb_settings"):
+        col1, col2 = st.columns(2)
+        with col1:
+            learning_rate_range = st.slider(
+                "learning_rate 范围",
+                min_value=0.01,
+                max_value=1.0,
+                value=st.session_state.hgb_param_ranges["learning_rate"],
+                step=0.01,
+            )
+            max_leaf_nodes_range = st.slider(
+                "max_leaf_nodes 范围",
+                min_value=2,
+                max_value=255,
+                value=st.session_state.hgb_param_ranges["max_leaf_nodes"],
+            )
+            max_depth_range = st.slider(
+                "max_depth 范围",
+                min_value=1,
+                max_value=30,
+                value=st.session_state.hgb_param_ranges["max_depth"],
+            )
+        with col2:
+            min_samples_leaf_range = st.slider(
+                "min_samples_leaf 范围",
+                min_value=1,
+                max_value=200,
+                value=st.session_state.hgb_param_ranges["min_samples_leaf"],
+            )
+            l2_regularization_range = st.slider(
+                "l2_regularization 范围",
+                min_value=0.0,
+                max_value=20.0,
+                value=st.session_state.hgb_param_ranges["l2_regularization"],
+                step=0.5,
+            )
+            max_bins_range = st.slider(
+                "max_bins 范围",
+                min_value=2,
+                max_value=255,
+                value=st.session_state.hgb_param_ranges.get("max_bins", (63, 255)),
+                help="特征分箱数，越小训练越快，越大越能保留数值细节。",
+            )
+
+        st.session_state.hgb_n_trials = st.slider(
+            "优化迭代次数 (n_trials)",
+            min_value=20,
+            max_value=500,
+            value=st.session_state.hgb_n_trials,
+            step=10,
+            help="每次试验会按验证集早停，迭代轮数无需手动设置。",
+        )
+
+        submitted = st.form_submit_button("确认直方图梯度提升参数设置")
+
+    if submitted:
+        st.session_state.hgb_param_ranges = {
+            "learning_rate": learning_rate_range,
+            "max_leaf_nodes": max_leaf_nodes_range,
+            "max_depth": max_depth_range,
+            "min_samples_leaf": min_samples_leaf_range,
+            "l2_regularization": l2_regularization_range,
+            "max_bins": max_bins_range,
+        }
+        st.success("直方图梯度提升参数设置已更新，将在下次模型训练时使用。")
+
+
 def display_linear_regression_settings():
     st.markdown("#### 线性回归超参数设置")
 
@@ -299,13 +432,22 @@ def display_linear_regression_settings():
 def display_model_selection():
     st.markdown("## 模型选择")
     with st.container(border=True):
-        model_options = ["随机森林", "决策树", "XGBoost", "线性回归"]
+        model_options = ["随机森林", "决策树", "XGBoost", "直方图梯度提升", "线性回归"]
 
         if st.session_state.problem_type == "classification":
             model_options.remove("线性回归")
 
+        is_large_dataset = (
+            st.session_state.df is not None
+            and len(st.session_state.df) > LARGE_DATASET_ROWS
+        )
         st.session_state.model_type = st.radio(
             "选择模型类型",
             model_options,
+            index=model_options.index("直方图梯度提升") if is_large_dataset else 0,
             key="model_type_radio",
         )
+        if is_large_dataset and st.session_state.model_type == "随机森林":
+            st.info(
+                f"数据超过 {LARGE_DATASET_ROWS:,} 行，直方图梯度提升通常能以更短的训练时间取得相近或更好的效果。"
+            )
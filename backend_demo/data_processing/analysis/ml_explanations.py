@@ -60,6 +60,9 @@ FEATURE_IMPORTANCE_EXPLANATION = """
 - 重要性分数基于该特征在树的分裂中被使用的频率和效果
 - 分数越高，表示该特征对模型的预测结果影响越大
 
+对于直方图梯度提升模型：
+- 重要性分数为置换重要性，即随机打乱该特征后模型得分的平均下降幅度
+
 理解特征重要性有助于：
 1. 识别最关键的预测因素
 2. 进行特征选择，简化模型
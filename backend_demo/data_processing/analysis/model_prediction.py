@@ -1,15 +1,14 @@
+import os
 import streamlit as st
 import pandas as pd
 import numpy as np
-from typing import List, Tuple
+from typing import List, Optional, Tuple
 
 from backend_demo.data_processing.analysis.model_predictor import (
+    PREDICT_BATCH_SIZE,
     ModelPredictor,
     list_available_models,
 )
-from backend_demo.data_processing.analysis.visualization import (
-    create_prediction_distribution_plot,
-)
 
 
 def display_saved_model_selection() -> None:
@@ -132,18 +131,60 @@ def display_prediction_execution() -> None:
                 execute_prediction()
 
 
+@st.cache_data(show_spinner=False)
+def _cached_predict(
+    models_dir: str,
+    model_filename: str,
+    problem_type: str,
+    mtime: float,
+    data: pd.DataFrame,
+) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+    """
+    按模型文件与输入数据缓存预测结果，重复点击或页面重跑时直接返回
+
+    Args:
+        models_dir: 模型目录
+        model_filename: 模型文件名
+        problem_type: 问题类型（分类或回归）
+        mtime: 模型文件修改时间，文件被覆盖后缓存失效
+        data: 待预测数据
+
+    Returns:
+        预测结果，以及分类问题的预测概率（回归问题为 None）
+    """
+    predictor = ModelPredictor(models_dir)
+    predictor.load_model(model_filename, problem_type)
+    if len(data) > PREDICT_BATCH_SIZE:
+        # 大数据集分批预处理与预测，避免一次性展开全部行的编码矩阵
+        batches = list(predictor.predict_batches(data))
+        predictions = np.concatenate([batch[0] for batch in batches])
+        if problem_type == "classification":
+            return predictions, np.concatenate([batch[1] for batch in batches])
+        return predictions, None
+    if problem_type == "classification":
+        return predictor.predict_all(data)
+    return predictor.predict(data), None
+
+
 def execute_prediction() -> None:
     """执行预测"""
     with st.spinner("正在执行预测..."):
         try:
-            predictions = st.session_state.predictor.predict(
-                st.session_state.uploaded_data
+            predictor = st.session_state.predictor
+            model_filename = predictor.get_model_info()["filename"]
+            predictions, probabilities = _cached_predict(
+                predictor.models_dir,
+                model_filename,
+                predictor.problem_type,
+                os.path.getmtime(
+                    os.path.join(
+                        predictor.models_dir, predictor.problem_type, model_filename
+                    )
+                ),
+                st.session_state.uploaded_data,
             )
             st.session_state.predictions = predictions
-            if st.session_state.predictor.problem_type == "classification":
-                probabilities = st.session_state.predictor.predict_proba(
-                    st.session_state.uploaded_data
-                )
+            if predictor.problem_type == "classification":
                 st.session_state.probabilities = probabilities
             st.success("✅ 预测完成！")
         except Exception as e:
@@ -157,12 +198,17 @@ def display_prediction_results() -> None:
 
         with st.container(border=True):
             display_prediction_distribution()
-            display_prediction_preview()
-            provide_download_option()
+            results = build_prediction_results()
+            display_prediction_preview(results)
+            provide_download_option(results)
 
 
 def display_prediction_distribution() -> None:
     """显示预测分布图"""
+    from backend_demo.data_processing.analysis.visualization import (
+        create_prediction_distribution_plot,
+    )
+
     st.markdown("### 预测分布")
     fig = create_prediction_distribution_plot(
         st.session_state.predictions, st.session_state.predictor.problem_type
@@ -170,29 +216,62 @@ def display_prediction_distribution() -> None:
     st.plotly_chart(fig, use_container_width=True)
 
 
-def display_prediction_preview() -> None:
-    """显示预测结果预览"""
-    st.markdown("### 预测结果预览")
-    original_data = st.session_state.uploaded_data.copy()
+def build_prediction_results() -> pd.DataFrame:
+    """
+    将预测列拼接到上传数据之后，不复制上传数据本身
+
+    Returns:
+        包含原始特征与预测结果的数据框
+    """
+    uploaded_data = st.session_state.uploaded_data
     if st.session_state.predictor.problem_type == "classification":
-        original_data["预测类别"] = st.session_state.predictions
-        original_data["预测概率"] = st.session_state.probabilities[:, 1]
+        prediction_columns = {
+            "预测类别": st.session_state.predictions,
+            "预测概率": st.session_state.probabilities[:, 1],
+        }
     else:
-        original_data["预测值"] = st.session_state.predictions
+        prediction_columns = {"预测值": st.session_state.predictions}
 
-    st.dataframe(original_data, use_container_width=True)
+    # 写时复制下 concat 只引用上传数据的原有列，不再整表复制
+    return pd.concat(
+        [uploaded_data, pd.DataFrame(prediction_columns, index=uploaded_data.index)],
+        axis=1,
+    )
 
 
-def provide_download_option() -> None:
-    """提供下载预测结果的选项"""
-    original_data = st.session_state.uploaded_data.copy()
-    if st.session_state.predictor.problem_type == "classification":
-        original_data["预测类别"] = st.session_state.predictions
-        original_data["预测概率"] = st.session_state.probabilities[:, 1]
-    else:
-        original_data["预测值"] = st.session_state.predictions
+def display_prediction_preview(results: pd.DataFrame) -> None:
+    """
+    显示预测结果预览
+
+    Args:
+        results: 包含预测结果的数据框
+    """
+    st.markdown("### 预测结果预览")
+    st.dataframe(results, use_container_width=True)
+
+
+@st.cache_data(show_spinner=False)
+def _df_to_csv_bytes(df: pd.DataFrame) -> bytes:
+    """
+    将数据框编码为带 BOM 的 CSV 字节，同一份结果只格式化一次
 
-    csv = original_data.to_csv(index=False).encode("utf-8-sig")
+    Args:
+        df: 数据框
+
+    Returns:
+        CSV 字节
+    """
+    return df.to_csv(index=False).encode("utf-8-sig")
+
+
+def provide_download_option(results: pd.DataFrame) -> None:
+    """
+    提供下载预测结果的选项
+
+    Args:
+        results: 包含预测结果的数据框
+    """
+    csv = _df_to_csv_bytes(results)
     st.download_button(
         label="📥 下载预测结果",
         data=csv,
@@ -2,17 +2,30 @@ import os
 import pandas as pd
 import numpy as np
 import joblib
-from typing import Dict, Any, List, Tuple
+import streamlit as st
+from typing import Dict, Any, Iterator, List, Optional, Tuple
 from sklearn.base import BaseEstimator
 from sklearn.pipeline import Pipeline
 from sklearn.compose import ColumnTransformer
 
+# 超过该行数的数据分批预测，每批只预处理这么多行
+PREDICT_BATCH_SIZE = 50_000
+
+
+@st.cache_resource(show_spinner=False)
+def _load_pipeline(model_path: str, mtime: float) -> Any:
+    # 反序列化结果在会话间共享，文件被覆盖后修改时间变化会重新加载；
+    # 模型中的 numpy 数组以只读方式映射自磁盘，按需读入而不是全部载入内存
+    return joblib.load(model_path, mmap_mode="r")
+
+
 class ModelPredictor:
     def __init__(self, models_dir: str = "data/ml_models"):
         self.models_dir = models_dir
         self.model: Pipeline = None
         self.model_info: Dict[str, Any] = {}
         self.original_features: List[str] = []
+        self._feature_index: pd.Index = pd.Index([])
         self.preprocessor: ColumnTransformer = None
         self.problem_type: str = None
 
@@ -21,13 +34,14 @@ class ModelPredictor:
         if not os.path.exists(model_path):
             raise FileNotFoundError(f"模型文件 {model_path} 不存在。")
 
-        loaded_model = joblib.load(model_path)
+        loaded_model = _load_pipeline(model_path, os.path.getmtime(model_path))
         if not isinstance(loaded_model, Pipeline):
             raise ValueError("加载的模型不是 Pipeline 类型。")
 
         self.model = loaded_model
         self.preprocessor = self.model.named_steps["preprocessor"]
         self.original_features = self.get_original_feature_names()
+        self._feature_index = pd.Index(self.original_features)
         self.problem_type = problem_type
 
         # 获取模型实例
@@ -62,13 +76,13 @@ class ModelPredictor:
         return original_features
 
     def preprocess_data(self, data: pd.DataFrame) -> pd.DataFrame:
-        expected_features = set(self.original_features)
-        input_features = set(data.columns)
-
-        if not expected_features.issubset(input_features):
-            missing_features = expected_features - input_features
-            raise ValueError(f"输入数据缺少以下特征：{missing_features}")
+        missing_features = self._feature_index.difference(data.columns)
+        if len(missing_features):
+            raise ValueError(f"输入数据缺少以下特征：{list(missing_features)}")
 
+        # 列已与模型特征完全一致时直接使用，避免重新选取列
+        if data.columns.equals(self._feature_index):
+            return data
         return data[self.original_features]
 
     def predict(self, data: pd.DataFrame) -> np.ndarray:
@@ -78,6 +92,21 @@ class ModelPredictor:
         preprocessed_data = self.preprocess_data(data)
         return self.model.predict(preprocessed_data)
 
+    def predict_batches(
+        self, data: pd.DataFrame, batch_size: int = PREDICT_BATCH_SIZE
+    ) -> Iterator[Tuple[np.ndarray, Optional[np.ndarray]]]:
+        """分批预测，逐批返回预测结果与分类概率（回归为 None），限制预处理的内存峰值"""
+        if self.model is None:
+            raise ValueError("模型未加载，请先调用 load_model 方法。")
+
+        preprocessed_data = self.preprocess_data(data)
+        for start in range(0, len(preprocessed_data), batch_size):
+            batch = preprocessed_data.iloc[start : start + batch_size]
+            if self.problem_type == "classification":
+                yield self.predict_all(batch)
+            else:
+                yield self.model.predict(batch), None
+
     def predict_proba(self, data: pd.DataFrame) -> np.ndarray:
         if self.model is None:
             raise ValueError("模型未加载，请先调用 load_model 方法。")
@@ -88,11 +117,24 @@ class ModelPredictor:
         preprocessed_data = self.preprocess_data(data)
         return self.model.predict_proba(preprocessed_data)
 
+    def predict_all(self, data: pd.DataFrame) -> Tuple[np.ndarray, np.ndarray]:
+        """分类问题只做一次预处理和 predict_proba，预测类别由概率的 argmax 得到"""
+        probabilities = self.predict_proba(data)
+        predictions = self.model.classes_.take(probabilities.argmax(axis=1))
+        return predictions, probabilities
+
     def get_model_info(self) -> Dict[str, Any]:
         return self.model_info
 
+
+@st.cache_data(show_spinner=False)
+def _list_model_files(folder_path: str, mtime: float) -> List[str]:
+    return [f for f in os.listdir(folder_path) if f.endswith(".joblib")]
+
+
 def list_available_models(
     models_dir: str = "data/ml_models", problem_type: str = "classification"
 ) -> List[str]:
     folder_path = os.path.join(models_dir, problem_type)
-    return [f for f in os.listdir(folder_path) if f.endswith(".joblib")]
\ No newline at end of file
+    # 目录修改时间作为缓存键的一部分，新增或删除模型文件后缓存自动失效
+    return _list_model_files(folder_path, os.path.getmtime(folder_path))
@@ -1,17 +1,17 @@
+import io
 import streamlit as st
 import pandas as pd
 import numpy as np
-from datetime import datetime
 from typing import Dict, Any
 
 from backend_demo.data_processing.analysis.model_utils import (
     train_model,
     save_model,
     add_model_record,
+    records_as_df,
     evaluate_model,
     get_feature_importance,
 )
-from backend_demo.data_processing.analysis.shap_analysis import calculate_shap_values
 from backend_demo.data_processing.analysis.visualization import (
     create_confusion_matrix_plot,
     create_residual_plot,
@@ -27,6 +27,7 @@ from backend_demo.data_processing.analysis.ml_components import (
     display_random_forest_settings,
     display_decision_tree_settings,
     display_xgboost_settings,
+    display_hist_gradient_boosting_settings,
     display_linear_regression_settings,
     display_model_selection,
     display_preprocessing_settings,
@@ -43,6 +44,53 @@ from backend_demo.data_processing.analysis.ml_explanations import (
     XGBOOST_LABEL_ENCODING_EXPLANATION,
 )
 
+# SHAP 重要性图只需要代表性样本，数据量超过该行数时随机抽样后再计算
+SHAP_MAX_SAMPLES = 2000
+
+
+@st.cache_data(show_spinner=False)
+def _load_uploaded(file_bytes: bytes, name: str) -> pd.DataFrame:
+    """
+    解析上传的文件，按文件内容与文件名缓存，页面重跑时无需重复解析
+
+    Args:
+        file_bytes: 文件内容
+        name: 文件名
+
+    Returns:
+        解析后的数据框
+    """
+    buffer = io.BytesIO(file_bytes)
+    if name.endswith(".csv"):
+        # pyarrow 的多线程 CSV 解析器明显快于默认引擎，结果仍为 numpy 类型的列
+        data = pd.read_csv(buffer, engine="pyarrow")
+    else:
+        try:
+            # calamine 引擎由 Rust 实现，解析 Excel 远快于纯 Python 的 openpyxl
+            data = pd.read_excel(buffer, engine="calamine")
+        except ImportError:
+            buffer.seek(0)
+            data = pd.read_excel(buffer)
+    return _downcast_numeric(data)
+
+
+def _downcast_numeric(data: pd.DataFrame) -> pd.DataFrame:
+    """
+    将数值列压缩为能容纳其取值的最小类型，减少后续训练扫描的内存
+
+    Args:
+        data: 数据框
+
+    Returns:
+        数值列压缩后的数据框
+    """
+    for col in data.select_dtypes("integer").columns:
+        data[col] = pd.to_numeric(data[col], downcast="integer")
+    # 浮点列只有在 float32 能近似保留原值（相对误差在默认容差内）时才会被压缩
+    for col in data.select_dtypes("float").columns:
+        data[col] = pd.to_numeric(data[col], downcast="float")
+    return data
+
 
 def display_data_upload_and_preview(for_prediction: bool = False) -> None:
     """
@@ -59,11 +107,7 @@ def display_data_upload_and_preview(for_prediction: bool = False) -> None:
 
         if uploaded_file is not None:
             try:
-                data = (
-                    pd.read_csv(uploaded_file)
-                    if uploaded_file.name.endswith(".csv")
-                    else pd.read_excel(uploaded_file)
-                )
+                data = _load_uploaded(uploaded_file.getvalue(), uploaded_file.name)
                 st.session_state.data_validated = False
 
                 if for_prediction:
@@ -71,11 +115,20 @@ def display_data_upload_and_preview(for_prediction: bool = False) -> None:
                 else:
                     handle_training_data_upload(data)
 
+                # 预览与数据类型表每个上传文件只生成一次，页面重跑时直接复用
+                if st.session_state.get("preview_file_id") != uploaded_file.file_id:
+                    st.session_state.preview_file_id = uploaded_file.file_id
+                    st.session_state.data_preview = data.head()
+                    st.session_state.data_dtypes = data.dtypes.astype(str).to_frame(
+                        "数据类型"
+                    )
+
                 st.write(f"数据集包含 {len(data)} 行和 {len(data.columns)} 列")
-                st.write(data.head())
+                st.write(st.session_state.data_preview)
 
-                with st.expander("查看数据类型信息", expanded=False):
-                    st.write(data.dtypes)
+                # 折叠的 expander 仍会发送其内容，改用开关只在需要时渲染数据类型表
+                if st.toggle("查看数据类型信息", value=False):
+                    st.write(st.session_state.data_dtypes)
 
             except Exception as e:
                 st.error(f"处理文件时出错：{str(e)}")
@@ -151,10 +204,18 @@ def display_column_selection() -> None:
             # 删除包含null值的行
             if st.button("确认特征和目标变量"):
                 original_row_count = len(st.session_state.df)
-                st.session_state.df = st.session_state.df.dropna(
-                    subset=[st.session_state.target_column]
-                    + st.session_state.feature_columns
+                # 一次性计算所有选中列的非空掩码，仅在确有空值时才切片复制数据
+                mask = (
+                    st.session_state.df[
+                        [st.session_state.target_column]
+                        + st.session_state.feature_columns
+                    ]
+                    .notna()
+                    .all(axis=1)
+                    .to_numpy()
                 )
+                if not mask.all():
+                    st.session_state.df = st.session_state.df.loc[mask]
                 new_row_count = len(st.session_state.df)
                 removed_rows = original_row_count - new_row_count
                 st.success(
@@ -164,11 +225,12 @@ def display_column_selection() -> None:
 
 def validate_problem_type() -> None:
     """验证问题类型"""
+    # 上传时数值列已被压缩为更窄的类型，按整数/浮点类别判断而不是具体位宽
+    is_numeric_target = (
+        st.session_state.df[st.session_state.target_column].dtype.kind in "if"
+    )
     if st.session_state.problem_type == "classification":
-        if st.session_state.df[st.session_state.target_column].dtype in [
-            "int64",
-            "float64",
-        ]:
+        if is_numeric_target:
             unique_values = st.session_state.df[
                 st.session_state.target_column
             ].nunique()
@@ -177,10 +239,7 @@ def validate_problem_type() -> None:
                     "目标变量看起来像是连续值。您可能需要选择回归问题而不是分类问题。"
                 )
     else:  # regression
-        if st.session_state.df[st.session_state.target_column].dtype not in [
-            "int64",
-            "float64",
-        ]:
+        if not is_numeric_target:
             st.warning("目标变量不是数值类型。回归问题需要数值类型的目标变量。")
 
 
@@ -210,6 +269,8 @@ def display_model_parameters_settings() -> None:
             display_decision_tree_settings()
         elif st.session_state.model_type == "XGBoost":
             display_xgboost_settings()
+        elif st.session_state.model_type == "直方图梯度提升":
+            display_hist_gradient_boosting_settings()
         elif st.session_state.model_type == "线性回归":
             display_linear_regression_settings()
 
@@ -231,6 +292,7 @@ def train_and_evaluate_model() -> None:
                 n_trials=n_trials,
                 numeric_preprocessor=st.session_state.numeric_preprocessor,
                 categorical_preprocessor=st.session_state.categorical_preprocessor,
+                sampler_name=st.session_state.optuna_sampler,
             )
             st.session_state.model_records = add_model_record(
                 st.session_state.model_records,
@@ -264,9 +326,16 @@ def get_model_params() -> tuple:
     if st.session_state.model_type == "随机森林":
         return st.session_state.rf_param_grid, st.session_state.rf_n_trials
     elif st.session_state.model_type == "决策树":
-        return st.session_state.dt_param_grid, None
+        n_trials = (
+            st.session_state.dt_n_trials
+            if st.session_state.dt_optimizer == "optuna"
+            else None
+        )
+        return st.session_state.dt_param_grid, n_trials
     elif st.session_state.model_type == "XGBoost":
         return st.session_state.xgb_param_ranges, st.session_state.xgb_n_trials
+    elif st.session_state.model_type == "直方图梯度提升":
+        return st.session_state.hgb_param_ranges, st.session_state.hgb_n_trials
     elif st.session_state.model_type == "线性回归":
         return None, None
     else:
@@ -275,7 +344,7 @@ def get_model_params() -> tuple:
 
 def display_model_records() -> None:
     """显示模型记录"""
-    if not st.session_state.model_records.empty:
+    if st.session_state.model_records:
         st.markdown("## 模型记录")
         with st.container(border=True):
             columns_order = [
@@ -289,12 +358,12 @@ def display_model_records() -> None:
                 "训练时间",
                 "参数",
             ]
-            temp_df = st.session_state.model_records.reindex(columns=columns_order)
+            temp_df = records_as_df(st.session_state.model_records, columns_order)
             temp_df["保存"] = False
             temp_df["最佳模型"] = False
 
             best_model_index = select_best_model(temp_df)
-            temp_df.loc[best_model_index, "最佳模型"] = True
+            temp_df.iat[best_model_index, temp_df.columns.get_loc("最佳模型")] = True
 
             edited_df = display_model_record_table(temp_df, columns_order)
 
@@ -309,12 +378,13 @@ def select_best_model(df: pd.DataFrame) -> int:
         df: 模型记录数据框
 
     Returns:
-        最佳模型的索引
+        最佳模型的行位置
     """
-    return (
-        df["交叉验证分数"].idxmax()
+    scores = df["交叉验证分数"].to_numpy(dtype=float)
+    return int(
+        np.nanargmax(scores)
         if st.session_state.problem_type == "classification"
-        else df["交叉验证分数"].idxmin()
+        else np.nanargmin(scores)
     )
 
 
@@ -375,14 +445,19 @@ def save_selected_models(edited_df: pd.DataFrame) -> None:
     Args:
         edited_df: 编辑后的模型记录数据框
     """
-    models_to_save = edited_df[edited_df["保存"]]
+    models_to_save = edited_df.loc[edited_df["保存"].to_numpy(dtype=bool)]
     if not models_to_save.empty:
-        for _, row in models_to_save.iterrows():
-            model_type = row["模型类型"]
-            problem_type = (
-                "classification" if row["问题类型"] == "分类" else "regression"
-            )
-            timestamp = datetime.strptime(row["训练时间"], "%Y-%m-%d %H:%M:%S")
+        # 训练时间整列一次性解析（Timestamp 是 datetime 的子类），
+        # 再只取需要的三列逐行迭代，避免 iterrows 为每行构造 Series
+        timestamps = pd.to_datetime(
+            models_to_save["训练时间"], format="%Y-%m-%d %H:%M:%S", cache=True
+        )
+        for model_type, problem_label, timestamp in zip(
+            models_to_save["模型类型"],
+            models_to_save["问题类型"],
+            timestamps,
+        ):
+            problem_type = "classification" if problem_label == "分类" else "regression"
             if (
                 st.session_state.model_results
                 and st.session_state.model_results["model"]
@@ -558,10 +633,10 @@ def display_model_interpretation() -> None:
 def display_feature_importance() -> None:
     """显示特征重要性"""
     st.markdown("### 模型特征重要性")
-    feature_importance = st.session_state.model_results[
-        "feature_importance"
-    ].sort_values(ascending=True)
-    fig = create_feature_importance_plot(feature_importance)
+    # 训练器返回的特征重要性已按降序排好，直接绘图，无需每次重跑时重新排序
+    fig = create_feature_importance_plot(
+        st.session_state.model_results["feature_importance"]
+    )
     st.plotly_chart(fig)
 
     with st.expander("特征重要性解释", expanded=False):
@@ -599,7 +674,7 @@ def display_shap_dependence() -> None:
         fig = create_shap_dependence_plot(
             st.session_state.shap_results["shap_values"],
             st.session_state.shap_results["X_processed"],
-            np.array(processed_feature_names),
+            st.session_state.shap_results["feature_name_to_index"][selected_feature],
             selected_feature,
         )
         st.plotly_chart(fig, use_container_width=True)
@@ -613,6 +688,11 @@ def calculate_and_store_shap_values() -> None:
     if "shap_results" in st.session_state:
         del st.session_state.shap_results
 
+    # shap 导入耗时较长，只在需要模型解释时加载
+    from backend_demo.data_processing.analysis.shap_analysis import (
+        calculate_shap_values,
+    )
+
     with st.spinner("正在计算SHAP值，这可能需要一些时间..."):
         try:
             model_step = (
@@ -626,6 +706,11 @@ def calculate_and_store_shap_values() -> None:
                 st.session_state.model_results["model"].named_steps["preprocessor"],
                 st.session_state.feature_columns,
                 st.session_state.problem_type,
+                max_samples=SHAP_MAX_SAMPLES,
+            )
+            # SHAP值已是 float32 内存映射数组，特征名保存为元组，绘图时无需再转换
+            shap_results["processed_feature_names"] = tuple(
+                shap_results["processed_feature_names"]
             )
             st.session_state.shap_results = shap_results
         except Exception as e:
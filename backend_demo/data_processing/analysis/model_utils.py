@@ -1,8 +1,15 @@
 import pandas as pd
 import numpy as np
+from scipy import sparse
 from sklearn.model_selection import train_test_split, cross_val_score
-from sklearn.preprocessing import StandardScaler, OneHotEncoder, OrdinalEncoder
+from sklearn.preprocessing import (
+    StandardScaler,
+    OneHotEncoder,
+    OrdinalEncoder,
+    FunctionTransformer,
+)
 from sklearn.compose import ColumnTransformer
+from sklearn.feature_extraction import FeatureHasher
 from sklearn.pipeline import Pipeline
 from sklearn.metrics import (
     roc_auc_score,
@@ -11,22 +18,96 @@ from sklearn.metrics import (
     mean_squared_error,
     r2_score,
 )
-from typing import List, Dict, Any, Tuple
+from typing import List, Dict, Any, FrozenSet, Optional, Sequence, Tuple, Union
 import joblib
+import hashlib
+import json
 from datetime import datetime
 import os
 from abc import ABC, abstractmethod
 
 from backend_demo.data_processing.analysis.model_predictor import ModelPredictor
 
+# Optuna 研究的持久化存储，重复训练同一数据与设置时可以接着已有的试验继续优化
+OPTUNA_STORAGE_PATH = os.path.join("data", "optuna_cache.db")
+# 超参数搜索中各候选参数共享同一份预处理结果，按输入内容缓存预处理器的拟合输出
+PIPELINE_CACHE_DIR = os.path.join("data", "sklearn_cache")
+# 预处理缓存的容量上限，每次搜索结束后淘汰最久未使用的条目
+PIPELINE_CACHE_BYTES_LIMIT = "2G"
+# 唯一值数量达到该阈值的分类特征视为高基数特征，独热编码时改用特征哈希
+HIGH_CARDINALITY_THRESHOLD = 50
+# 高基数分类特征哈希后的固定列数
+HASHED_FEATURES = 256
+
+# 各模型类型可调的参数名
+VALID_PARAMS: Dict[str, FrozenSet[str]] = {
+    "随机森林": frozenset(
+        [
+            "n_estimators",
+            "max_depth",
+            "min_samples_split",
+            "min_samples_leaf",
+            "max_features",
+        ]
+    ),
+    "决策树": frozenset(
+        [
+            "classifier__max_depth",
+            "classifier__min_samples_split",
+            "classifier__min_samples_leaf",
+            "classifier__max_leaf_nodes",
+        ]
+    ),
+    "XGBoost": frozenset(
+        [
+            "n_estimators",
+            "max_depth",
+            "learning_rate",
+            "subsample",
+            "colsample_bytree",
+            "min_child_weight",
+            "reg_alpha",
+            "reg_lambda",
+            "max_bin",
+        ]
+    ),
+    "线性回归": frozenset(),
+    "直方图梯度提升": frozenset(
+        [
+            "learning_rate",
+            "max_leaf_nodes",
+            "max_depth",
+            "min_samples_leaf",
+            "l2_regularization",
+            "max_bins",
+        ]
+    ),
+}
+
+# 模型类型到训练器类的映射，首次调用 get_model_class 时填充
+_MODEL_CLASSES: Dict[str, type] = {}
+
 
 class BaseModel(ABC):
     """基础模型类，为所有模型提供通用接口"""
 
+    # 训练特征使用的数值类型，树模型内部按 float32 比较分裂点，无需更高精度
+    feature_dtype = np.float32
+
     def __init__(self, problem_type: str):
         self.problem_type = problem_type
         self.model = None
         self.preprocessor = None
+        # 由 train_model 根据训练数据设置，独热编码时这些列改用特征哈希
+        self.high_cardinality_cols: List[str] = []
+        # Optuna 采样器名称，由 train_model 设置
+        self.sampler_name = "tpe"
+        # 训练器自身（估计器、网格搜索、并行 trial）可用的线程数，-1 表示全部核心；
+        # 由 train_model 设置，多模型并行比较时每个训练器只用单线程
+        self.n_jobs = -1
+        # 测试集 (X_test, y_test)，由 train_model 设置，供置换重要性等使用；
+        # 没有划分测试集时为 None
+        self.holdout_data: Optional[Tuple[pd.DataFrame, pd.Series]] = None
 
     @abstractmethod
     def optimize(
@@ -38,7 +119,7 @@ class BaseModel(ABC):
         param_ranges: Dict[str, Any],
         n_trials: int,
     ) -> Tuple[Pipeline, Dict[str, Any], float, int]:
-        """优化模型参数"""
+        """优化模型参数，返回的 pipeline 已用最佳参数在全部训练数据上拟合，train 直接复用无需再次拟合"""
         pass
 
     @abstractmethod
@@ -72,6 +153,7 @@ def prepare_data(
     df: pd.DataFrame,
     target_column: str,
     feature_columns: List[str],
+    problem_type: str,
     test_size: float = 0.3,
 ) -> Tuple[pd.DataFrame, pd.DataFrame, pd.Series, pd.Series, List[str], List[str]]:
     """
@@ -81,6 +163,7 @@ def prepare_data(
         df: 原始数据框
         target_column: 目标变量列名
         feature_columns: 特征列名列表
+        problem_type: 问题类型（'classification' 或 'regression'）
         test_size: 测试集比例
 
     Returns:
@@ -90,15 +173,30 @@ def prepare_data(
     y = df[target_column]
 
     if test_size > 0:
+        # 分类问题按类别分层划分，保证测试集的类别比例与整体一致；
+        # 存在只有一个样本的类别时无法分层，退回随机划分
+        stratify = None
+        if problem_type == "classification" and y.value_counts().min() >= 2:
+            stratify = y
         X_train, X_test, y_train, y_test = train_test_split(
-            X, y, test_size=test_size, random_state=42
+            X, y, test_size=test_size, random_state=42, stratify=stratify
         )
     else:
         X_train, y_train = X, y
         X_test, y_test = pd.DataFrame(), pd.Series()
 
-    categorical_cols = X.select_dtypes(include=["object", "category"]).columns.tolist()
-    numerical_cols = X.select_dtypes(include=["int64", "float64"]).columns.tolist()
+    # 基于 dtypes 一次完成列分类；字符串列在 pandas 3 中为 str 类型，也归为分类特征
+    dtypes = X.dtypes
+    categorical_mask = dtypes.map(
+        lambda dtype: isinstance(dtype, pd.CategoricalDtype)
+        or pd.api.types.is_string_dtype(dtype)
+    ).to_numpy(dtype=bool)
+    # 上传数据的数值列可能已被压缩为更窄的整数或浮点类型
+    numerical_mask = dtypes.map(
+        lambda dtype: isinstance(dtype, np.dtype) and dtype.kind in "if"
+    ).to_numpy(dtype=bool)
+    categorical_cols = X.columns[categorical_mask].tolist()
+    numerical_cols = X.columns[numerical_mask].tolist()
 
     return X_train, X_test, y_train, y_test, categorical_cols, numerical_cols
 
@@ -108,6 +206,8 @@ def create_preprocessor(
     numerical_cols: List[str],
     numeric_preprocessor: str = "StandardScaler",
     categorical_preprocessor: str = "OneHotEncoder",
+    dtype: type = np.float32,
+    high_cardinality_cols: Sequence[str] = (),
 ) -> ColumnTransformer:
     """
     创建数据预处理器
@@ -117,31 +217,219 @@ def create_preprocessor(
         numerical_cols: 数值特征列名列表
         numeric_preprocessor: 数值特征预处理方法
         categorical_preprocessor: 分类特征预处理方法
+        dtype: 预处理输出的数值类型，树模型使用 float32 即可
+        high_cardinality_cols: 高基数分类特征列名，独热编码时改用固定列数的特征哈希
 
     Returns:
         ColumnTransformer 预处理器
     """
-    numeric_transformer = (
-        StandardScaler() if numeric_preprocessor == "StandardScaler" else "passthrough"
+    # 数值分支的输出转换为目标类型，与编码器输出一致，拼接后无需再整体转换
+    cast = FunctionTransformer(
+        np.asarray, kw_args={"dtype": dtype}, feature_names_out="one-to-one"
     )
+    if numeric_preprocessor == "StandardScaler":
+        numeric_transformer = Pipeline(
+            steps=[("scaler", StandardScaler()), ("cast", cast)]
+        )
+    else:
+        numeric_transformer = cast
 
     if categorical_preprocessor == "OneHotEncoder":
+        # 独热编码输出稀疏矩阵，高基数分类特征时由 ColumnTransformer 拼接为稀疏结果
         categorical_transformer = OneHotEncoder(
-            handle_unknown="ignore", drop="if_binary"
+            handle_unknown="ignore",
+            drop="if_binary",
+            sparse_output=True,
+            dtype=dtype,
         )
     elif categorical_preprocessor == "OrdinalEncoder":
         categorical_transformer = OrdinalEncoder(
-            handle_unknown="use_encoded_value", unknown_value=-1
+            handle_unknown="use_encoded_value", unknown_value=-1, dtype=dtype
         )
     else:  # 'passthrough'
         categorical_transformer = "passthrough"
 
-    return ColumnTransformer(
-        transformers=[
-            ("num", numeric_transformer, numerical_cols),
-            ("cat", categorical_transformer, categorical_cols),
+    transformers = [("num", numeric_transformer, numerical_cols)]
+    if categorical_preprocessor == "OneHotEncoder" and high_cardinality_cols:
+        # 高基数列逐值独热会产生大量稀疏列，改为哈希到固定宽度，列数不随唯一值数量增长
+        low_cardinality_cols = [
+            col for col in categorical_cols if col not in set(high_cardinality_cols)
         ]
+        hasher = FunctionTransformer(
+            _hash_categories,
+            kw_args={"dtype": dtype},
+            feature_names_out=_hashed_feature_names,
+        )
+        transformers += [
+            ("cat", categorical_transformer, low_cardinality_cols),
+            ("cat_hash", hasher, list(high_cardinality_cols)),
+        ]
+    else:
+        transformers.append(("cat", categorical_transformer, categorical_cols))
+
+    return ColumnTransformer(transformers=transformers)
+
+
+def _hash_categories(X: pd.DataFrame, dtype: type = np.float32) -> sparse.csr_matrix:
+    """
+    将高基数分类特征哈希为固定列数的稀疏矩阵
+
+    Args:
+        X: 高基数分类特征
+        dtype: 输出的数值类型
+
+    Returns:
+        形状为 (样本数, HASHED_FEATURES) 的稀疏矩阵
+    """
+    # 取值带上列名再哈希，不同列中的相同取值不会落入同一位置
+    rows = zip(*(f"{col}=" + X[col].astype(str) for col in X.columns))
+    hasher = FeatureHasher(
+        n_features=HASHED_FEATURES,
+        input_type="string",
+        alternate_sign=False,
+        dtype=dtype,
+    )
+    return hasher.transform(rows)
+
+
+def _hashed_feature_names(transformer: Any, input_features: Any) -> np.ndarray:
+    """特征哈希输出的列名"""
+    return np.array([f"hash_{i}" for i in range(HASHED_FEATURES)], dtype=object)
+
+
+def get_high_cardinality_cols(
+    X: pd.DataFrame, categorical_cols: List[str]
+) -> List[str]:
+    """
+    找出唯一值数量达到阈值的分类特征
+
+    Args:
+        X: 训练特征
+        categorical_cols: 分类特征列名列表
+
+    Returns:
+        高基数分类特征列名列表
+    """
+    if not categorical_cols:
+        return []
+    n_unique = X[categorical_cols].nunique()
+    return n_unique.index[n_unique >= HIGH_CARDINALITY_THRESHOLD].tolist()
+
+
+def to_float32(X: Any) -> Any:
+    """
+    将预处理后的特征矩阵转换为 float32，稠密矩阵同时保证内存连续
+
+    Args:
+        X: 预处理后的特征矩阵（numpy 数组或 scipy 稀疏矩阵）
+
+    Returns:
+        float32 特征矩阵
+    """
+    if sparse.issparse(X):
+        return X.astype(np.float32)
+    return np.ascontiguousarray(X, dtype=np.float32)
+
+
+def get_study_name(
+    prefix: str, X: pd.DataFrame, y: Any, settings: Dict[str, Any]
+) -> str:
+    """
+    根据训练数据与搜索设置生成 Optuna 研究名称
+
+    Args:
+        prefix: 名称前缀（模型类型）
+        X: 训练特征
+        y: 训练标签
+        settings: 影响搜索空间或目标函数的设置，如参数范围、预处理方法
+
+    Returns:
+        研究名称，数据或设置变化时名称随之变化
+    """
+    hasher = hashlib.blake2b(digest_size=8)
+    hasher.update(pd.util.hash_pandas_object(X, index=True).values.tobytes())
+    hasher.update(
+        pd.util.hash_pandas_object(
+            pd.Series(np.asarray(y)), index=False
+        ).values.tobytes()
+    )
+    hasher.update(json.dumps(settings, sort_keys=True, default=str).encode())
+    return f"{prefix}_{hasher.hexdigest()}"
+
+
+def create_sampler(sampler_name: str = "tpe") -> Any:
+    """
+    创建 Optuna 采样器
+
+    Args:
+        sampler_name: 采样器名称，"tpe" 或 "cmaes"
+
+    Returns:
+        optuna.samplers.BaseSampler: 采样器
+    """
+    from optuna.samplers import CmaEsSampler, TPESampler
+
+    tpe = TPESampler(multivariate=True, group=True, seed=42)
+    if sampler_name == "cmaes":
+        try:
+            import cmaes  # noqa: F401
+        except ImportError:
+            return tpe
+        # CMA-ES 利用参数之间的相关性，只处理数值参数，
+        # 分类参数（如 max_features）交给 TPE 独立采样；前 20 次试验随机探索作为起点
+        return CmaEsSampler(
+            n_startup_trials=20,
+            independent_sampler=tpe,
+            seed=42,
+            warn_independent_sampling=False,
+        )
+    return tpe
+
+
+def run_study(
+    study_name: str,
+    objective: Any,
+    n_trials: int,
+    n_jobs: int = 1,
+    **study_kwargs,
+) -> Any:
+    """
+    创建或加载持久化的 Optuna 研究，并只运行尚未完成的试验
+
+    Args:
+        study_name: 研究名称
+        objective: 目标函数
+        n_trials: 研究的总试验次数
+        n_jobs: 当前进程内并行运行的试验数
+        **study_kwargs: 传给 optuna.create_study 的其他参数（采样器、剪枝器等）
+
+    Returns:
+        optuna.Study: 完成优化的研究
+    """
+    import optuna
+    from optuna.study import MaxTrialsCallback
+    from optuna.trial import TrialState
+
+    os.makedirs(os.path.dirname(OPTUNA_STORAGE_PATH), exist_ok=True)
+    study = optuna.create_study(
+        direction="maximize",
+        study_name=study_name,
+        storage=f"sqlite:///{OPTUNA_STORAGE_PATH}",
+        load_if_exists=True,
+        **study_kwargs,
     )
+    finished_states = (TrialState.COMPLETE, TrialState.PRUNED)
+    finished_trials = len(study.get_trials(deepcopy=False, states=finished_states))
+    if finished_trials < n_trials:
+        # 研究保存在 SQLite 中，多个会话或进程可以同时向同一研究提交试验；
+        # 回调按存储中已完成的试验数判断，保证各方合计不超过 n_trials
+        study.optimize(
+            objective,
+            n_trials=n_trials - finished_trials,
+            n_jobs=n_jobs,
+            callbacks=[MaxTrialsCallback(n_trials, states=finished_states)],
+        )
+    return study
 
 
 def evaluate_model(
@@ -159,16 +447,24 @@ def evaluate_model(
     Returns:
         包含评估指标的字典
     """
-    y_test_pred = model.predict(X_test)
-
     if problem_type == "classification":
-        y_test_pred_proba = model.predict_proba(X_test)[:, 1]
+        # 只做一次预处理与预测，类别标签由概率的 argmax 得到，与 predict 的结果一致
+        proba = model.predict_proba(X_test)
+        y_test_pred = model.classes_.take(proba.argmax(axis=1))
+        if proba.shape[1] == 2:
+            test_roc_auc = roc_auc_score(y_test, proba[:, 1])
+        else:
+            # 多分类复用同一份概率矩阵，按一对多计算，类别直接取自模型无需再从标签中统计
+            test_roc_auc = roc_auc_score(
+                y_test, proba, multi_class="ovr", labels=model.classes_
+            )
         return {
-            "test_roc_auc": roc_auc_score(y_test, y_test_pred_proba),
+            "test_roc_auc": test_roc_auc,
             "test_confusion_matrix": confusion_matrix(y_test, y_test_pred),
             "test_classification_report": classification_report(y_test, y_test_pred),
         }
     else:  # regression
+        y_test_pred = model.predict(X_test)
         mse = mean_squared_error(y_test, y_test_pred)
         r2 = r2_score(y_test, y_test_pred)
         return {
@@ -179,44 +475,51 @@ def evaluate_model(
         }
 
 
-def get_feature_importance(model: Any, preprocessor: ColumnTransformer) -> pd.Series:
+def get_feature_importance(
+    model: Any, preprocessor: ColumnTransformer, top_k: Optional[int] = None
+) -> pd.Series:
     """
     获取特征重要性
 
     Args:
         model: 训练好的模型
         preprocessor: 数据预处理器
+        top_k: 只返回最重要的前 k 个特征，为空时返回全部特征
 
     Returns:
-        特征重要性的 Series
+        按重要性降序排列的特征重要性 Series
     """
     feature_names = preprocessor.get_feature_names_out()
     if hasattr(model, "feature_importances_"):
-        feature_importance = pd.Series(
-            model.feature_importances_,
-            index=feature_names,
-        ).sort_values(ascending=False)
+        importances = np.asarray(model.feature_importances_, dtype=np.float64)
     elif hasattr(model, "coef_"):
-        feature_importance = pd.Series(
-            np.abs(model.coef_),
-            index=feature_names,
-        ).sort_values(ascending=False)
+        importances = np.abs(np.ravel(model.coef_)).astype(np.float64)
     else:
         raise ValueError("模型不支持特征重要性计算")
-    return feature_importance
+
+    # 直接在 numpy 数组上降序排序，只构建一次 Series；
+    # 只需前 k 个特征时先用 argpartition 线性时间选出候选，再只对这 k 个排序
+    if top_k is not None and top_k < len(importances):
+        candidates = np.argpartition(-importances, top_k - 1)[:top_k]
+        order = candidates[np.argsort(-importances[candidates], kind="stable")]
+    else:
+        order = np.argsort(-importances, kind="stable")
+    return pd.Series(importances[order], index=feature_names[order])
 
 
 def train_model(
     df: pd.DataFrame,
     target_column: str,
     feature_columns: List[str],
-    model_type: str,
+    model_type: Union[str, List[str]],
     problem_type: str,
     test_size: float = 0.3,
     param_ranges: Dict[str, Any] = None,
     n_trials: int = 100,
     numeric_preprocessor: str = "StandardScaler",
     categorical_preprocessor: str = "OneHotEncoder",
+    sampler_name: str = "tpe",
+    n_jobs: int = -1,
 ) -> Dict[str, Any]:
     """
     训练模型的主函数
@@ -225,19 +528,36 @@ def train_model(
         df: 原始数据框
         target_column: 目标变量列名
         feature_columns: 特征列名列表
-        model_type: 模型类型
+        model_type: 模型类型，传入列表时并行训练多个模型用于比较
         problem_type: 问题类型（'classification' 或 'regression'）
         test_size: 测试集比例
-        param_ranges: 参数范围
+        param_ranges: 参数范围；比较多个模型时为以模型类型为键的参数范围字典
         n_trials: 优化尝试次数
         numeric_preprocessor: 数值特征预处理方法
         categorical_preprocessor: 分类特征预处理方法
+        sampler_name: Optuna 采样器名称（"tpe" 或 "cmaes"），用于随机森林与 XGBoost
+        n_jobs: 训练器可用的线程数，-1 表示全部核心；比较多个模型时固定为单线程
 
     Returns:
-        包含训练结果的字典
+        包含训练结果的字典；比较多个模型时为以模型类型为键的训练结果字典
     """
+    if isinstance(model_type, list):
+        return _train_models_in_parallel(
+            df,
+            target_column,
+            feature_columns,
+            model_type,
+            problem_type,
+            test_size,
+            param_ranges or {},
+            n_trials,
+            numeric_preprocessor,
+            categorical_preprocessor,
+            sampler_name,
+        )
+
     X_train, X_test, y_train, y_test, categorical_cols, numerical_cols = prepare_data(
-        df, target_column, feature_columns, test_size
+        df, target_column, feature_columns, problem_type, test_size
     )
 
     model_class = get_model_class(model_type)
@@ -246,6 +566,18 @@ def train_model(
         param_ranges = filter_valid_params(param_ranges, get_valid_params(model_type))
 
     model = model_class(problem_type)
+    model.high_cardinality_cols = get_high_cardinality_cols(X_train, categorical_cols)
+    model.sampler_name = sampler_name
+    model.n_jobs = n_jobs
+
+    # 数值特征在进入预处理前就转换为模型所需的精度，减少预处理与训练时的内存带宽
+    if numerical_cols:
+        numeric_dtypes = dict.fromkeys(numerical_cols, model.feature_dtype)
+        X_train = X_train.astype(numeric_dtypes)
+        if test_size > 0:
+            X_test = X_test.astype(numeric_dtypes)
+    if test_size > 0:
+        model.holdout_data = (X_test, y_test)
 
     results = model.train(
         X_train,
@@ -275,22 +607,90 @@ def train_model(
     return results
 
 
+def _train_models_in_parallel(
+    df: pd.DataFrame,
+    target_column: str,
+    feature_columns: List[str],
+    model_types: List[str],
+    problem_type: str,
+    test_size: float,
+    param_ranges: Dict[str, Dict[str, Any]],
+    n_trials: int,
+    numeric_preprocessor: str,
+    categorical_preprocessor: str,
+    sampler_name: str,
+) -> Dict[str, Dict[str, Any]]:
+    """
+    在独立进程中并行训练多个模型类型
+
+    Args:
+        df: 原始数据框
+        target_column: 目标变量列名
+        feature_columns: 特征列名列表
+        model_types: 模型类型列表
+        problem_type: 问题类型（'classification' 或 'regression'）
+        test_size: 测试集比例
+        param_ranges: 以模型类型为键的参数范围字典
+        n_trials: 优化尝试次数
+        numeric_preprocessor: 数值特征预处理方法
+        categorical_preprocessor: 分类特征预处理方法
+        sampler_name: Optuna 采样器名称
+
+    Returns:
+        以模型类型为键的训练结果字典
+    """
+    # 各模型类型之间完全独立，按模型类型在进程间并行。
+    # inner_max_num_threads 只限制工作进程中的 BLAS/OpenMP 线程池，
+    # 估计器、网格搜索与并行 trial 的 n_jobs 需另外通过 n_jobs=1 设为单线程
+    with joblib.parallel_config(backend="loky", inner_max_num_threads=1):
+        results = joblib.Parallel(n_jobs=min(len(model_types), os.cpu_count() or 1))(
+            joblib.delayed(train_model)(
+                df,
+                target_column,
+                feature_columns,
+                model_type,
+                problem_type,
+                test_size,
+                param_ranges.get(model_type),
+                n_trials,
+                numeric_preprocessor=numeric_preprocessor,
+                categorical_preprocessor=categorical_preprocessor,
+                sampler_name=sampler_name,
+                n_jobs=1,
+            )
+            for model_type in model_types
+        )
+    return dict(zip(model_types, results))
+
+
 def get_model_class(model_type: str):
     """根据模型类型获取对应的模型类"""
-    from backend_demo.data_processing.analysis.random_forest_trainer import RandomForestModel
-    from backend_demo.data_processing.analysis.decision_tree_trainer import DecisionTreeModel
-    from backend_demo.data_processing.analysis.xgboost_trainer import XGBoostModel
-    from backend_demo.data_processing.analysis.linear_regression_trainer import (
-        LinearRegressionModel,
-    )
+    # 训练器模块依赖本模块，首次调用时才导入，之后直接查表
+    if not _MODEL_CLASSES:
+        from backend_demo.data_processing.analysis.random_forest_trainer import (
+            RandomForestModel,
+        )
+        from backend_demo.data_processing.analysis.decision_tree_trainer import (
+            DecisionTreeModel,
+        )
+        from backend_demo.data_processing.analysis.xgboost_trainer import XGBoostModel
+        from backend_demo.data_processing.analysis.linear_regression_trainer import (
+            LinearRegressionModel,
+        )
+        from backend_demo.data_processing.analysis.hist_gradient_boosting_trainer import (
+            HistGradientBoostingModel,
+        )
 
-    model_classes = {
-        "随机森林": RandomForestModel,
-        "决策树": DecisionTreeModel,
-        "XGBoost": XGBoostModel,
-        "线性回归": LinearRegressionModel,
-    }
-    return model_classes.get(model_type)
+        _MODEL_CLASSES.update(
+            {
+                "随机森林": RandomForestModel,
+                "决策树": DecisionTreeModel,
+                "XGBoost": XGBoostModel,
+                "线性回归": LinearRegressionModel,
+                "直方图梯度提升": HistGradientBoostingModel,
+            }
+        )
+    return _MODEL_CLASSES.get(model_type)
 
 
 def save_model(
@@ -299,6 +699,7 @@ def save_model(
     problem_type: str,
     timestamp: datetime,
     save_path: str = "data/ml_models",
+    compress: bool = False,
 ) -> str:
     """
     保存模型
@@ -309,6 +710,7 @@ def save_model(
         problem_type: 问题类型
         timestamp: 时间戳
         save_path: 保存路径
+        compress: 是否压缩模型文件。压缩后文件更小，但加载时无法内存映射，需整体读入内存
 
     Returns:
         保存的文件路径
@@ -323,16 +725,26 @@ def save_model(
         f"{model_type}_{problem_type}_{timestamp.strftime('%Y%m%d_%H%M%S')}.joblib"
     )
     file_path = os.path.join(full_save_path, file_name)
-    joblib.dump(model, file_path)
+    # 默认不压缩，ModelPredictor 以内存映射方式按需读取模型中的数组
+    compression = 0
+    if compress:
+        try:
+            import lz4  # noqa: F401
+
+            # lz4 解压速度远高于 zlib，读写开销接近未压缩文件
+            compression = ("lz4", 3)
+        except ImportError:
+            compression = ("zlib", 3)
+    joblib.dump(model, file_path, compress=compression)
     return file_path
 
 
 def add_model_record(
-    model_records: pd.DataFrame,
+    model_records: List[Dict[str, Any]],
     model_type: str,
     problem_type: str,
     model_results: Dict[str, Any],
-) -> pd.DataFrame:
+) -> List[Dict[str, Any]]:
     """
     添加模型记录
 
@@ -360,45 +772,37 @@ def add_model_record(
         "最佳轮次": model_results.get("best_trial", "N/A"),
     }
 
-    return pd.concat([model_records, pd.DataFrame([new_record])], ignore_index=True)
+    # 记录以字典列表保存，追加不再复制整张表，展示时才转换为数据框
+    model_records.append(new_record)
+    return model_records
+
+
+def records_as_df(
+    model_records: List[Dict[str, Any]], columns: List[str]
+) -> pd.DataFrame:
+    """
+    将模型记录转换为数据框，只在展示时调用
+
+    Args:
+        model_records: 模型记录列表
+        columns: 数据框的列顺序，记录中缺少的列填充为空值
+
+    Returns:
+        模型记录数据框
+    """
+    return pd.DataFrame(model_records, columns=columns)
 
 
 def filter_valid_params(
-    params: Dict[str, Any], valid_params: List[str]
+    params: Dict[str, Any], valid_params: FrozenSet[str]
 ) -> Dict[str, Any]:
     """过滤有效参数"""
     return {k: v for k, v in params.items() if k in valid_params}
 
 
-def get_valid_params(model_type: str) -> List[str]:
-    """获取模型的有效参数列表"""
-    valid_params = {
-        "随机森林": [
-            "n_estimators",
-            "max_depth",
-            "min_samples_split",
-            "min_samples_leaf",
-            "max_features",
-        ],
-        "决策树": [
-            "classifier__max_depth",
-            "classifier__min_samples_split",
-            "classifier__min_samples_leaf",
-            "classifier__max_leaf_nodes",
-        ],
-        "XGBoost": [
-            "n_estimators",
-            "max_depth",
-            "learning_rate",
-            "subsample",
-            "colsample_bytree",
-            "min_child_weight",
-            "reg_alpha",
-            "reg_lambda",
-        ],
-        "线性回归": [],
-    }
-    return valid_params.get(model_type, [])
+def get_valid_params(model_type: str) -> FrozenSet[str]:
+    """获取模型的有效参数集合"""
+    return VALID_PARAMS.get(model_type, frozenset())
 
 
 def initialize_session_state() -> Dict[str, Any]:
@@ -432,22 +836,24 @@ def initialize_session_state() -> Dict[str, Any]:
             "min_child_weight": (1, 10),
             "reg_alpha": (0, 10),
             "reg_lambda": (0, 10),
+            "max_bin": (64, 512),
+        },
+        "hgb_param_ranges": {
+            "learning_rate": (0.01, 0.3),
+            "max_leaf_nodes": (15, 127),
+            "max_depth": (3, 15),
+            "min_samples_leaf": (5, 100),
+            "l2_regularization": (0.0, 10.0),
+            "max_bins": (63, 255),
         },
         "custom_param_ranges": None,
-        "model_records": pd.DataFrame(
-            columns=[
-                "模型ID",
-                "模型类型",
-                "问题类型",
-                "训练时间",
-                "参数",
-                "交叉验证分数",
-                "测试集分数",
-                "最佳轮次",
-            ]
-        ),
+        "model_records": [],
         "rf_n_trials": 100,
+        "dt_optimizer": "grid",
+        "optuna_sampler": "tpe",
+        "dt_n_trials": 100,
         "xgb_n_trials": 200,
+        "hgb_n_trials": 100,
         "predictor": ModelPredictor(),
         "uploaded_data": None,
         "predictions": None,
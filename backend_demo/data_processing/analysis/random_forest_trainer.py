@@ -1,20 +1,30 @@
 import pandas as pd
 import numpy as np
 from sklearn.ensemble import RandomForestClassifier, RandomForestRegressor
-from sklearn.model_selection import cross_val_score
+from sklearn.model_selection import KFold, StratifiedKFold, train_test_split
+from sklearn.metrics import get_scorer
+from sklearn.base import clone
 from sklearn.pipeline import Pipeline
 import optuna
-from optuna.samplers import TPESampler
+from optuna.pruners import SuccessiveHalvingPruner
 from typing import List, Dict, Any, Tuple
 import logging
 
 from backend_demo.data_processing.analysis.model_utils import (
     BaseModel,
     create_preprocessor,
+    create_sampler,
     evaluate_model,
     get_feature_importance,
+    get_study_name,
+    run_study,
+    to_float32,
 )
 
+# 超参数搜索只需比较配置的相对优劣，搜索阶段使用子样本和较少的树，最终模型再用全量数据与完整参数训练
+HPO_MAX_SAMPLES = 20000
+HPO_MAX_ESTIMATORS = 100
+
 
 class RandomForestModel(BaseModel):
     """随机森林模型类"""
@@ -55,7 +65,41 @@ class RandomForestModel(BaseModel):
             numerical_cols,
             self.numeric_preprocessor,
             self.categorical_preprocessor,
+            high_cardinality_cols=self.high_cardinality_cols,
         )
+        X_search, y_search = X_train, y_train
+        if len(X_train) > HPO_MAX_SAMPLES:
+            X_search, _, y_search, _ = train_test_split(
+                X_train,
+                y_train,
+                train_size=HPO_MAX_SAMPLES,
+                stratify=y_train if self.problem_type == "classification" else None,
+                random_state=42,
+            )
+        y_search_values = np.asarray(y_search)
+
+        if self.problem_type == "classification":
+            cv = StratifiedKFold(n_splits=5)
+            scorer = get_scorer("roc_auc")
+        else:
+            cv = KFold(n_splits=5)
+            scorer = get_scorer("neg_mean_squared_error")
+
+        # 预处理器与超参数无关，在进入 Optuna 循环前为每折拟合一次并缓存变换结果，
+        # 避免每个 trial 的每个折都重复拟合，同时验证折的统计量不会泄漏到训练折
+        folds = []
+        for train_idx, val_idx in cv.split(X_search, y_search_values):
+            fold_preprocessor = clone(preprocessor)
+            folds.append(
+                (
+                    to_float32(
+                        fold_preprocessor.fit_transform(X_search.iloc[train_idx])
+                    ),
+                    to_float32(fold_preprocessor.transform(X_search.iloc[val_idx])),
+                    y_search_values[train_idx],
+                    y_search_values[val_idx],
+                )
+            )
 
         def objective(trial):
             params = {
@@ -84,34 +128,75 @@ class RandomForestModel(BaseModel):
                 ),
             }
 
+            # 逐折训练并上报累计平均分，表现不佳的试验在前几折即被剪枝。
+            # 并行只保留一层：trial（run_study 使用 n_jobs=1）与折都顺序执行，
+            # 只有森林内部按树并行（n_jobs），避免多层并行叠加造成线程超额订阅；
+            # 随机森林建树不经过 BLAS/OpenMP，无需再限制这些线程池
+            search_params = {
+                **params,
+                "n_estimators": min(params["n_estimators"], HPO_MAX_ESTIMATORS),
+            }
             if self.problem_type == "classification":
-                rf = RandomForestClassifier(**params, random_state=42)
-                scoring = "roc_auc"
+                rf = RandomForestClassifier(
+                    **search_params, random_state=42, n_jobs=self.n_jobs
+                )
             else:
-                rf = RandomForestRegressor(**params, random_state=42)
-                scoring = "neg_mean_squared_error"
+                rf = RandomForestRegressor(
+                    **search_params, random_state=42, n_jobs=self.n_jobs
+                )
 
-            pipeline = Pipeline(
-                steps=[("preprocessor", preprocessor), ("classifier", rf)]
-            )
-            scores = cross_val_score(
-                pipeline, X_train, y_train, cv=5, scoring=scoring, n_jobs=-1
-            )
+            scores = []
+            for fold_idx, fold in enumerate(folds):
+                X_fold_train, X_fold_val, y_fold_train, y_fold_val = fold
+                rf.fit(X_fold_train, y_fold_train)
+                scores.append(scorer(rf, X_fold_val, y_fold_val))
+                trial.report(np.mean(scores), fold_idx)
+                if trial.should_prune():
+                    raise optuna.TrialPruned()
             return np.mean(scores)
 
-        study = optuna.create_study(direction="maximize", sampler=TPESampler())
-        study.optimize(objective, n_trials=n_trials, n_jobs=-1)
+        study_name = get_study_name(
+            "rf",
+            X_train,
+            y_train,
+            {
+                "problem_type": self.problem_type,
+                "param_ranges": param_ranges,
+                "categorical_cols": categorical_cols,
+                "numerical_cols": numerical_cols,
+                "numeric_preprocessor": self.numeric_preprocessor,
+                "categorical_preprocessor": self.categorical_preprocessor,
+                "sampler": self.sampler_name,
+                "hpo_max_samples": HPO_MAX_SAMPLES,
+                "hpo_max_estimators": HPO_MAX_ESTIMATORS,
+            },
+        )
+        # 重复训练同一数据与设置时从已有试验继续，不再从头开始
+        study = run_study(
+            study_name,
+            objective,
+            n_trials,
+            sampler=create_sampler(self.sampler_name),
+            # 异步逐级减半（ASHA）：每一折为一级资源，只有排名前 1/3 的试验进入下一折
+            pruner=SuccessiveHalvingPruner(min_resource=1, reduction_factor=3),
+        )
 
         best_params = study.best_params
         if self.problem_type == "classification":
-            best_rf = RandomForestClassifier(**best_params, random_state=42)
+            best_rf = RandomForestClassifier(
+                **best_params, random_state=42, n_jobs=self.n_jobs
+            )
         else:
-            best_rf = RandomForestRegressor(**best_params, random_state=42)
+            best_rf = RandomForestRegressor(
+                **best_params, random_state=42, n_jobs=self.n_jobs
+            )
 
+        best_rf.fit(to_float32(preprocessor.fit_transform(X_train)), y_train)
+        # 保存的模型在训练进程之外预测，不沿用训练时的线程限制
+        best_rf.set_params(n_jobs=-1)
         best_pipeline = Pipeline(
             steps=[("preprocessor", preprocessor), ("classifier", best_rf)]
         )
-        best_pipeline.fit(X_train, y_train)
         best_score = study.best_value
         best_trial = study.best_trial.number + 1
 
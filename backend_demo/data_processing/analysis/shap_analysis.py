@@ -1,8 +1,185 @@
+import os
 import shap
+import hashlib
+import tempfile
 import pandas as pd
 import numpy as np
 import plotly.graph_objects as go
-from typing import Any, Dict, List, Tuple
+from collections import OrderedDict
+from joblib import Parallel, delayed
+from scipy import sparse
+from sklearn.linear_model import LinearRegression
+
+from backend_demo.data_processing.analysis.model_utils import to_float32
+from typing import Any, Dict, List, Optional, Tuple
+
+# 按模型对象缓存解释器与SHAP值，切换页面或重复解释同一模型时无需重新计算
+_CACHE_SIZE = 4
+_explainer_cache: "OrderedDict[int, Tuple[Any, Any]]" = OrderedDict()
+_shap_values_cache: "OrderedDict[Tuple[int, str], Tuple[Any, np.ndarray]]" = (
+    OrderedDict()
+)
+
+# 树模型SHAP值按行分块并行计算，每块至少包含的行数
+SHAP_MIN_BATCH = 512
+# SHAP值与预处理后特征的内存映射文件目录，结果长期保存在会话中时由操作系统按需换出
+SHAP_CACHE_DIR = os.path.join("data", "shap_cache")
+
+
+def _cache_get(cache: OrderedDict, key: Any, model: Any) -> Any:
+    """
+    从缓存中读取与模型对应的值。
+
+    Args:
+        cache: 缓存字典
+        key: 缓存键
+        model: 模型对象，用于确认 id 未被其他对象复用
+
+    Returns:
+        缓存的值，未命中时返回 None
+    """
+    cached = cache.get(key)
+    if cached is None or cached[0] is not model:
+        return None
+    cache.move_to_end(key)
+    return cached[1]
+
+
+def _cache_put(cache: OrderedDict, key: Any, model: Any, value: Any) -> None:
+    """
+    写入缓存并淘汰最久未使用的条目。
+
+    Args:
+        cache: 缓存字典
+        key: 缓存键
+        model: 模型对象
+        value: 要缓存的值
+    """
+    cache[key] = (model, value)
+    cache.move_to_end(key)
+    while len(cache) > _CACHE_SIZE:
+        cache.popitem(last=False)
+
+
+def _to_memmap(array: np.ndarray) -> np.memmap:
+    """
+    将数组以 float32 写入匿名临时文件并返回其内存映射。
+
+    Args:
+        array: 稠密数组
+
+    Returns:
+        与原数组内容相同的 float32 内存映射数组
+    """
+    os.makedirs(SHAP_CACHE_DIR, exist_ok=True)
+    # 临时文件没有路径，映射被回收后由操作系统自动删除，不会在磁盘上残留
+    mapped = np.memmap(
+        tempfile.TemporaryFile(dir=SHAP_CACHE_DIR),
+        dtype=np.float32,
+        mode="w+",
+        shape=array.shape,
+    )
+    mapped[:] = array
+    mapped.flush()
+    return mapped
+
+
+def _get_explainer(model: Any, X_processed: Any) -> Any:
+    """
+    获取（或创建）模型对应的SHAP解释器。
+
+    Args:
+        model: 训练好的模型
+        X_processed: 预处理后的特征数据，仅线性模型用作背景数据
+
+    Returns:
+        SHAP解释器
+    """
+    explainer = _cache_get(_explainer_cache, id(model), model)
+    if explainer is None:
+        if hasattr(model, "coef_"):  # Linear models
+            # 背景数据最多取 100 行，避免默认使用全部样本
+            masker = shap.maskers.Independent(X_processed, max_samples=100)
+            explainer = shap.LinearExplainer(model, masker)
+        else:  # Tree-based models
+            explainer = shap.TreeExplainer(
+                model, feature_perturbation="tree_path_dependent"
+            )
+        _cache_put(_explainer_cache, id(model), model, explainer)
+    return explainer
+
+
+def _tree_shap_values(explainer: shap.TreeExplainer, X_processed: Any) -> Any:
+    """
+    按行分块并行计算树模型的SHAP值。
+
+    Args:
+        explainer: 树模型SHAP解释器
+        X_processed: 预处理后的特征数据（稠密或稀疏矩阵）
+
+    Returns:
+        与 explainer.shap_values 返回格式相同的SHAP值
+    """
+    n_rows = X_processed.shape[0]
+    batch = max(SHAP_MIN_BATCH, n_rows // ((os.cpu_count() or 1) * 4))
+    bounds = np.linspace(0, n_rows, max(1, n_rows // batch) + 1, dtype=int)
+    if len(bounds) <= 2:
+        return explainer.shap_values(X_processed, check_additivity=False)
+
+    # TreeExplainer 的 C++ 实现会释放 GIL，用线程即可并行且无需复制模型
+    parts = Parallel(n_jobs=-1, prefer="threads")(
+        delayed(explainer.shap_values)(X_processed[start:end], check_additivity=False)
+        for start, end in zip(bounds[:-1], bounds[1:])
+    )
+    if isinstance(parts[0], list):
+        return [np.concatenate(per_class, axis=0) for per_class in zip(*parts)]
+    return np.concatenate(parts, axis=0)
+
+
+def _get_shap(model: Any, X: pd.DataFrame, X_processed: Any) -> np.ndarray:
+    """
+    计算（或从缓存读取）二维SHAP值矩阵。
+
+    Args:
+        model: 训练好的模型
+        X: 原始特征数据，用于生成缓存键
+        X_processed: 预处理后的特征数据
+
+    Returns:
+        形状为 (样本数, 特征数) 的SHAP值
+    """
+    fingerprint = hashlib.blake2b(
+        pd.util.hash_pandas_object(X, index=True).values.tobytes(), digest_size=16
+    ).hexdigest()
+    key = (id(model), fingerprint)
+    shap_values = _cache_get(_shap_values_cache, key, model)
+    if shap_values is not None:
+        return shap_values
+
+    if isinstance(model, LinearRegression):
+        # 线性模型在特征独立假设下的SHAP值有解析解：coef * (x - E[x])
+        X_dense = X_processed.toarray() if sparse.issparse(X_processed) else X_processed
+        shap_values = _to_memmap(
+            (X_dense - X_dense.mean(axis=0)) * np.ravel(model.coef_)
+        )
+        _cache_put(_shap_values_cache, key, model, shap_values)
+        return shap_values
+
+    explainer = _get_explainer(model, X_processed)
+    if isinstance(explainer, shap.TreeExplainer):
+        shap_values = _tree_shap_values(explainer, X_processed)
+    else:
+        shap_values = explainer.shap_values(X_processed)
+
+    # For binary classification, we use the positive class
+    if isinstance(shap_values, list):
+        shap_values = shap_values[1]
+    elif shap_values.ndim == 3:
+        shap_values = shap_values[:, :, 1]
+
+    shap_values = _to_memmap(shap_values)
+    _cache_put(_shap_values_cache, key, model, shap_values)
+    return shap_values
 
 
 def calculate_shap_values(
@@ -11,6 +188,7 @@ def calculate_shap_values(
     preprocessor: Any,
     feature_names: List[str],
     problem_type: str,
+    max_samples: Optional[int] = None,
 ) -> Dict[str, Any]:
     """
     计算SHAP值并生成SHAP摘要图。
@@ -21,12 +199,20 @@ def calculate_shap_values(
         preprocessor: 数据预处理器
         feature_names: 原始特征名列表
         problem_type: 问题类型 ("classification" 或 "regression")
+        max_samples: 参与计算的最大样本数，超过时随机抽样，为空时使用全部样本
 
     Returns:
         包含SHAP值和图表数据的字典
     """
-    # 预处理数据
-    X_processed = preprocessor.transform(X)
+    # 全局重要性只需要代表性样本，先抽样再预处理，后续结果与抽样后的数据一一对应
+    if max_samples is not None and len(X) > max_samples:
+        rows = np.random.default_rng(42).choice(len(X), max_samples, replace=False)
+        X = X.iloc[np.sort(rows)]
+
+    # 预处理数据，稠密结果同样映射到文件，稀疏矩阵本身已足够紧凑
+    X_processed = to_float32(preprocessor.transform(X))
+    if not sparse.issparse(X_processed):
+        X_processed = _to_memmap(X_processed)
 
     # 获取预处理后的特征名称
     if hasattr(preprocessor, "get_feature_names_out"):
@@ -34,52 +220,40 @@ def calculate_shap_values(
     else:
         processed_feature_names = np.array(feature_names)
 
-    # 创建SHAP解释器
-    if problem_type == "classification":
-        explainer = shap.TreeExplainer(model)
-        shap_values = explainer.shap_values(X_processed)
-        if isinstance(shap_values, list):
-            shap_values = shap_values[
-                1
-            ]  # For binary classification, we use the positive class
-        elif shap_values.ndim == 3:
-            shap_values = shap_values[
-                :, :, 1
-            ]  # For binary classification with 3D output
-    else:
-        if hasattr(model, "coef_"):  # Linear models
-            explainer = shap.LinearExplainer(model, X_processed)
-            shap_values = explainer.shap_values(X_processed)
-        else:  # Tree-based models
-            explainer = shap.TreeExplainer(model)
-            shap_values = explainer.shap_values(X_processed)
+    # 计算SHAP值（解释器与结果均按模型缓存）
+    shap_values = _get_shap(model, X, X_processed)
 
     # 确保shap_values是二维的
     if shap_values.ndim != 2:
         raise ValueError(f"Unexpected SHAP values shape: {shap_values.shape}")
 
-    # 计算特征重要性
-    feature_importance = np.abs(shap_values).mean(0)
+    # 计算特征重要性，在 numpy 数组上得到降序排列的列位置
+    importance = np.abs(shap_values).mean(0)
+    order = np.argsort(-importance, kind="stable")
     feature_importance = pd.Series(
-        feature_importance, index=processed_feature_names
-    ).sort_values(ascending=False)
-
-    # 创建SHAP摘要图数据
-    summary_data = []
-    for feature in feature_importance.index:
-        feature_shap = shap_values[:, list(processed_feature_names).index(feature)]
-        summary_data.append(
-            {
-                "feature": feature,
-                "importance": feature_importance[feature],
-                "shap_values": feature_shap.tolist(),
-            }
+        importance[order], index=np.asarray(processed_feature_names)[order]
+    )
+
+    # 创建SHAP摘要图数据：按重要性顺序一次取出所有列并转置为连续的 float32 矩阵，
+    # 每个特征的SHAP值是其中一行的视图，直接交给 Plotly，不再逐个转换为 Python 浮点数
+    ordered_shap = np.ascontiguousarray(shap_values[:, order].T, dtype=np.float32)
+    summary_data = [
+        {"feature": feature, "importance": imp, "shap_values": row}
+        for feature, imp, row in zip(
+            feature_importance.index,
+            feature_importance.to_numpy(),
+            ordered_shap,
         )
+    ]
 
     return {
         "shap_values": shap_values,
         "feature_importance": feature_importance,
         "summary_data": summary_data,
         "processed_feature_names": processed_feature_names,
+        # 特征名到列位置的映射只构建一次，选择特征时直接查表，无需线性查找
+        "feature_name_to_index": {
+            name: i for i, name in enumerate(processed_feature_names)
+        },
         "X_processed": X_processed,
     }
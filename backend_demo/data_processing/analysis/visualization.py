@@ -1,9 +1,35 @@
 import plotly.graph_objects as go
 import pandas as pd
 import numpy as np
+import streamlit as st
+from scipy import sparse
 from typing import List, Dict, Any
 
+# 训练完成后绘图输入不再变化，图形按输入内容缓存，切换页签或页面重跑时不再重复构建
 
+# 散点图最多绘制的点数，超过时固定随机种子抽样，控制序列化与浏览器渲染的开销
+SCATTER_MAX_POINTS = 10000
+# 残差样本超过该数量时改用二维直方图，图形大小不再随样本数增长
+RESIDUAL_HISTOGRAM_THRESHOLD = 20000
+
+
+def _sample_indices(n: int, max_points: int = SCATTER_MAX_POINTS) -> np.ndarray:
+    """
+    抽取用于绘图的样本位置。
+
+    Args:
+        n (int): 样本总数
+        max_points (int): 最多保留的样本数
+
+    Returns:
+        np.ndarray: 升序排列的样本位置
+    """
+    if n <= max_points:
+        return np.arange(n)
+    return np.sort(np.random.default_rng(0).choice(n, max_points, replace=False))
+
+
+@st.cache_data(show_spinner=False)
 def create_confusion_matrix_plot(cm: np.ndarray) -> go.Figure:
     """
     创建混淆矩阵的热力图。
@@ -14,21 +40,19 @@ def create_confusion_matrix_plot(cm: np.ndarray) -> go.Figure:
     Returns:
         go.Figure: Plotly图形对象
     """
-    cm_sum = np.sum(cm)
-    cm_percentages = cm / cm_sum * 100
+    cm_percentages = cm.astype(np.float32) / np.float32(cm.sum()) * 100
+    n_classes = cm.shape[0]
 
     fig = go.Figure(
         data=go.Heatmap(
             z=cm_percentages,
-            x=["预测: 0", "预测: 1"],
-            y=["实际: 0", "实际: 1"],
+            x=[f"预测: {i}" for i in range(n_classes)],
+            y=[f"实际: {i}" for i in range(n_classes)],
             hoverongaps=False,
             colorscale="Blues",
-            text=[
-                [f"{v:.1f}%<br>({cm[i][j]})" for j, v in enumerate(row)]
-                for i, row in enumerate(cm_percentages)
-            ],
-            texttemplate="%{text}",
+            # 单元格文字由模板从百分比与原始计数生成，不再逐格拼接字符串
+            customdata=cm,
+            texttemplate="%{z:.1f}%<br>(%{customdata})",
             textfont={"size": 14},
         )
     )
@@ -43,6 +67,7 @@ def create_confusion_matrix_plot(cm: np.ndarray) -> go.Figure:
     return fig
 
 
+@st.cache_data(show_spinner=False)
 def create_residual_plot(y_test: np.ndarray, y_pred: np.ndarray) -> go.Figure:
     """
     创建残差图。
@@ -54,22 +79,31 @@ def create_residual_plot(y_test: np.ndarray, y_pred: np.ndarray) -> go.Figure:
     Returns:
         go.Figure: Plotly图形对象
     """
-    residuals = y_test - y_pred
+    y_pred = np.asarray(y_pred)
+    residuals = np.asarray(y_test) - y_pred
 
     fig = go.Figure()
-    fig.add_trace(go.Scatter(x=y_pred, y=residuals, mode="markers"))
+    if len(residuals) > RESIDUAL_HISTOGRAM_THRESHOLD:
+        fig.add_trace(
+            go.Histogram2d(
+                x=y_pred, y=residuals, nbinsx=100, nbinsy=100, colorscale="Blues"
+            )
+        )
+    else:
+        fig.add_trace(go.Scatter(x=y_pred, y=residuals, mode="markers"))
     fig.update_layout(
         title="残差图", xaxis_title="预测值", yaxis_title="残差", width=600, height=400
     )
     return fig
 
 
+@st.cache_data(show_spinner=False)
 def create_feature_importance_plot(feature_importance: pd.Series) -> go.Figure:
     """
     创建特征重要性条形图。
 
     Args:
-        feature_importance (pd.Series): 特征重要性序列
+        feature_importance (pd.Series): 按重要性降序排列的特征重要性序列
 
     Returns:
         go.Figure: Plotly图形对象
@@ -88,10 +122,12 @@ def create_feature_importance_plot(feature_importance: pd.Series) -> go.Figure:
         height=max(500, len(feature_importance) * 25),
         width=600,
         margin=dict(t=40),
+        yaxis=dict(autorange="reversed"),
     )
     return fig
 
 
+@st.cache_data(show_spinner=False)
 def create_prediction_distribution_plot(
     predictions: np.ndarray, problem_type: str
 ) -> go.Figure:
@@ -116,6 +152,7 @@ def create_prediction_distribution_plot(
     return fig
 
 
+@st.cache_data(show_spinner=False)
 def create_shap_importance_plot(
     feature_importance: pd.Series, max_display: int = 20
 ) -> go.Figure:
@@ -123,13 +160,14 @@ def create_shap_importance_plot(
     创建SHAP特征重要性图。
 
     Args:
-        feature_importance (pd.Series): 包含特征重要性的pandas Series
+        feature_importance (pd.Series): 按重要性降序排列的特征重要性序列
         max_display (int): 显示的最大特征数
 
     Returns:
         go.Figure: Plotly图形对象
     """
-    top_features = feature_importance.nlargest(max_display)
+    # calculate_shap_values 返回的重要性已降序排列，直接取前 max_display 个，无需再次选取
+    top_features = feature_importance.iloc[:max_display]
 
     fig = go.Figure(
         go.Bar(x=top_features.values, y=top_features.index, orientation="h")
@@ -145,10 +183,22 @@ def create_shap_importance_plot(
     return fig
 
 
+@st.cache_data(
+    show_spinner=False,
+    # 独热编码后的特征矩阵可能是稀疏矩阵，按其底层数组计算缓存键
+    hash_funcs={
+        sparse.csr_matrix: lambda m: (
+            m.shape,
+            m.indptr.tobytes(),
+            m.indices.tobytes(),
+            m.data.tobytes(),
+        )
+    },
+)
 def create_shap_dependence_plot(
     shap_values: np.ndarray,
     features: np.ndarray,
-    feature_names: np.ndarray,
+    feature_index: int,
     selected_feature: str,
 ) -> go.Figure:
     """
@@ -156,16 +206,18 @@ def create_shap_dependence_plot(
 
     Args:
         shap_values (np.ndarray): SHAP值数组
-        features (np.ndarray): 预处理后的特征数据
-        feature_names (np.ndarray): 预处理后的特征名称数组
+        features (np.ndarray): 预处理后的特征数据（numpy 数组或 CSR 稀疏矩阵）
+        feature_index (int): 选定特征在预处理后特征中的列位置
         selected_feature (str): 选定的特征名称
 
     Returns:
         go.Figure: Plotly图形对象
     """
-    feature_index = np.where(feature_names == selected_feature)[0][0]
-    feature_value = features[:, feature_index]
-    shap_value = shap_values[:, feature_index]
+    rows = _sample_indices(shap_values.shape[0])
+    feature_value = features[rows, feature_index]
+    if sparse.issparse(feature_value):
+        feature_value = feature_value.toarray().ravel()
+    shap_value = shap_values[rows, feature_index]
 
     fig = go.Figure()
     fig.add_trace(
@@ -180,11 +232,10 @@ def create_shap_dependence_plot(
                 showscale=True,
                 colorbar=dict(title=selected_feature),
             ),
-            text=[
-                f"{selected_feature}: {val}<br>SHAP value: {shap:.2f}"
-                for val, shap in zip(feature_value, shap_value)
-            ],
-            hoverinfo="text",
+            # 悬停文本由浏览器按模板从坐标生成，不再为每个点构建并序列化字符串
+            hovertemplate=(
+                f"{selected_feature}: %{{x}}<br>SHAP value: %{{y:.2f}}<extra></extra>"
+            ),
         )
     )
 
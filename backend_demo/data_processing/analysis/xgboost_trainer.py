@@ -1,27 +1,65 @@
+import json
+import os
+import warnings
+from functools import lru_cache
 import pandas as pd
 import numpy as np
+import xgboost as xgb
 from xgboost import XGBClassifier, XGBRegressor
+from sklearn.base import clone
+from sklearn.metrics import mean_squared_error, roc_auc_score
 from sklearn.pipeline import Pipeline
-from sklearn.preprocessing import LabelEncoder
-from sklearn.model_selection import cross_val_score
+from sklearn.model_selection import KFold, StratifiedKFold
 import optuna
+from optuna.pruners import HyperbandPruner
 import logging
 from typing import List, Dict, Any, Tuple
 
 from backend_demo.data_processing.analysis.model_utils import (
     BaseModel,
     create_preprocessor,
+    create_sampler,
     evaluate_model,
     get_feature_importance,
+    get_study_name,
+    run_study,
+    to_float32,
 )
 
+# 每折在验证集上连续这么多轮没有提升即停止增加树
+EARLY_STOPPING_ROUNDS = 50
+
+
+@lru_cache(maxsize=1)
+def _cuda_available() -> bool:
+    """
+    检测 XGBoost 能否在 GPU 上训练
+
+    Returns:
+        bool: 是否有可用的 CUDA 设备
+    """
+    if not xgb.build_info().get("USE_CUDA"):
+        return False
+    # 找不到 GPU 时 XGBoost 只发出警告并回退到 CPU，通过训练后的实际设备判断
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        booster = xgb.train(
+            {"device": "cuda", "tree_method": "hist"},
+            xgb.DMatrix(np.zeros((2, 1)), label=[0, 1]),
+            num_boost_round=1,
+        )
+    config = json.loads(booster.save_config())
+    return config["learner"]["generic_param"]["device"].startswith("cuda")
+
 
 class XGBoostModel(BaseModel):
     """XGBoost 模型类"""
 
-    def __init__(self, problem_type: str):
+    def __init__(self, problem_type: str, use_gpu: bool = True):
         super().__init__(problem_type)
-        self.label_encoder = None
+        # 为 False 时始终在 CPU 上训练，否则在检测到可用 GPU 时使用 GPU
+        self.use_gpu = use_gpu
+        self.label_classes = None
         self.logger = logging.getLogger(__name__)
         self.numeric_preprocessor = "StandardScaler"
         self.categorical_preprocessor = "OneHotEncoder"
@@ -34,6 +72,7 @@ class XGBoostModel(BaseModel):
         numerical_cols: List[str],
         param_ranges: Dict[str, Any],
         n_trials: int,
+        parallelism_mode: str = "model",
     ) -> Tuple[Pipeline, Dict[str, Any], float, int]:
         """
         优化 XGBoost 模型参数
@@ -45,18 +84,81 @@ class XGBoostModel(BaseModel):
             numerical_cols: 数值特征列名列表
             param_ranges: 参数范围
             n_trials: 优化尝试次数
+            parallelism_mode: 并行方式。"model" 为试验顺序执行、XGBoost 使用全部可用线程；
+                "trials" 为每个可用线程运行一个试验、XGBoost 单线程
 
         Returns:
             Tuple[Pipeline, Dict[str, Any], float, int]:
             最佳模型pipeline, 最佳参数, 最佳得分, 最佳试验次数
         """
         self.logger.info("开始 XGBoost 模型参数优化")
+        # 只在一层上并行，避免试验并行与建树线程叠加造成 CPU 超额订阅
+        n_threads = (os.cpu_count() or 1) if self.n_jobs == -1 else self.n_jobs
+        if parallelism_mode == "model":
+            study_n_jobs, model_n_jobs = 1, n_threads
+        elif parallelism_mode == "trials":
+            study_n_jobs, model_n_jobs = n_threads, 1
+        else:
+            raise ValueError(f"不支持的并行方式: {parallelism_mode}")
+
         preprocessor = create_preprocessor(
             categorical_cols,
             numerical_cols,
             self.numeric_preprocessor,
             self.categorical_preprocessor,
+            high_cardinality_cols=self.high_cardinality_cols,
         )
+        y_train_values = np.asarray(y_train)
+
+        # 统一使用直方图算法，有 GPU 时在 GPU 上构建直方图
+        device = "cuda" if self.use_gpu and _cuda_available() else "cpu"
+        booster_params = {
+            "tree_method": "hist",
+            "device": device,
+            "seed": 42,
+            "nthread": model_n_jobs,
+        }
+        if self.problem_type == "classification":
+            cv = StratifiedKFold(n_splits=5)
+            n_classes = len(np.unique(y_train_values))
+            if n_classes > 2:
+                booster_params.update(
+                    objective="multi:softprob",
+                    num_class=n_classes,
+                    eval_metric="mlogloss",
+                )
+            else:
+                booster_params.update(
+                    objective="binary:logistic", eval_metric="logloss"
+                )
+        else:
+            cv = KFold(n_splits=5)
+            booster_params.update(objective="reg:squarederror", eval_metric="rmse")
+
+        def score(y_true: np.ndarray, y_pred: np.ndarray) -> float:
+            if self.problem_type == "regression":
+                return -mean_squared_error(y_true, y_pred)
+            if y_pred.ndim == 2:
+                return roc_auc_score(y_true, y_pred, multi_class="ovr")
+            return roc_auc_score(y_true, y_pred)
+
+        # 交叉验证的折在搜索开始前划分一次，预处理器与超参数无关，每折只拟合一次；
+        # 预处理结果直接构建为 DMatrix，所有 trial 共用，不再由 sklearn 接口逐次转换
+        folds = []
+        for train_idx, val_idx in cv.split(X_train, y_train_values):
+            fold_preprocessor = clone(preprocessor)
+            X_fold_train = to_float32(
+                fold_preprocessor.fit_transform(X_train.iloc[train_idx])
+            )
+            X_fold_val = to_float32(fold_preprocessor.transform(X_train.iloc[val_idx]))
+            y_fold_val = y_train_values[val_idx]
+            folds.append(
+                (
+                    xgb.DMatrix(X_fold_train, label=y_train_values[train_idx]),
+                    xgb.DMatrix(X_fold_val, label=y_fold_val),
+                    y_fold_val,
+                )
+            )
 
         def objective(trial):
             params = {
@@ -101,38 +203,99 @@ class XGBoostModel(BaseModel):
                     param_ranges["reg_lambda"][0],
                     param_ranges["reg_lambda"][1],
                 ),
+                # 直方图分箱数，分箱越少建树越快
+                "max_bin": trial.suggest_int(
+                    "max_bin",
+                    param_ranges["max_bin"][0],
+                    param_ranges["max_bin"][1],
+                ),
             }
 
-            if self.problem_type == "classification":
-                xgb = XGBClassifier(**params, random_state=42, eval_metric="logloss")
-                scoring = "roc_auc"
-            else:
-                xgb = XGBRegressor(**params, random_state=42, eval_metric="rmse")
-                scoring = "neg_mean_squared_error"
+            num_boost_round = params.pop("n_estimators")
+            train_params = {**booster_params, **params}
 
-            pipeline = Pipeline(
-                steps=[("preprocessor", preprocessor), ("classifier", xgb)]
-            )
-            scores = cross_val_score(
-                pipeline, X_train, y_train, cv=5, scoring=scoring, n_jobs=-1
-            )
+            # 每折以验证集早停，并上报累计平均分，表现不佳的试验在前几折即被剪枝
+            scores = []
+            best_iterations = []
+            for fold_idx, (dtrain, dval, y_fold_val) in enumerate(folds):
+                booster = xgb.train(
+                    train_params,
+                    dtrain,
+                    num_boost_round=num_boost_round,
+                    evals=[(dval, "val")],
+                    early_stopping_rounds=EARLY_STOPPING_ROUNDS,
+                    verbose_eval=False,
+                )
+                best_iterations.append(booster.best_iteration + 1)
+                y_pred = booster.predict(
+                    dval, iteration_range=(0, booster.best_iteration + 1)
+                )
+                scores.append(score(y_fold_val, y_pred))
+                trial.report(np.mean(scores), fold_idx)
+                if trial.should_prune():
+                    raise optuna.TrialPruned()
+            # 最终模型没有验证集可供早停，使用各折早停时的平均树数
+            trial.set_user_attr("n_estimators", int(np.mean(best_iterations)))
             return np.mean(scores)
 
-        study = optuna.create_study(direction="maximize")
-        study.optimize(objective, n_trials=n_trials, n_jobs=-1)
+        study_name = get_study_name(
+            "xgb",
+            X_train,
+            y_train,
+            {
+                "problem_type": self.problem_type,
+                "param_ranges": param_ranges,
+                "categorical_cols": categorical_cols,
+                "numerical_cols": numerical_cols,
+                "numeric_preprocessor": self.numeric_preprocessor,
+                "categorical_preprocessor": self.categorical_preprocessor,
+                "sampler": self.sampler_name,
+                "early_stopping_rounds": EARLY_STOPPING_ROUNDS,
+            },
+        )
+        study = run_study(
+            study_name,
+            objective,
+            n_trials,
+            n_jobs=study_n_jobs,
+            sampler=create_sampler(self.sampler_name),
+            # 以折为资源单位，五折中逐级淘汰排名靠后的试验
+            pruner=HyperbandPruner(min_resource=1, max_resource=5, reduction_factor=3),
+        )
 
-        best_params = study.best_params
+        # 返回与记录的参数即最终模型实际使用的参数，n_estimators 为早停后的树数
+        best_params = {
+            **study.best_params,
+            "n_estimators": study.best_trial.user_attrs.get(
+                "n_estimators", study.best_params["n_estimators"]
+            ),
+        }
         if self.problem_type == "classification":
             best_xgb = XGBClassifier(
-                **best_params, random_state=42, eval_metric="logloss"
+                **best_params,
+                random_state=42,
+                eval_metric="logloss",
+                n_jobs=n_threads,
+                tree_method="hist",
+                device=device,
             )
         else:
-            best_xgb = XGBRegressor(**best_params, random_state=42, eval_metric="rmse")
+            best_xgb = XGBRegressor(
+                **best_params,
+                random_state=42,
+                eval_metric="rmse",
+                n_jobs=n_threads,
+                tree_method="hist",
+                device=device,
+            )
 
         best_pipeline = Pipeline(
             steps=[("preprocessor", preprocessor), ("classifier", best_xgb)]
         )
         best_pipeline.fit(X_train, y_train)
+        # 保存的模型在 CPU 上预测，避免在没有 GPU 的环境中加载后出现设备不匹配；
+        # 预测不沿用训练时的线程限制
+        best_xgb.set_params(device="cpu", n_jobs=None)
         best_score = study.best_value
         best_trial = study.best_trial.number + 1
 
@@ -149,6 +312,7 @@ class XGBoostModel(BaseModel):
         n_trials: int = 100,
         numeric_preprocessor: str = "StandardScaler",
         categorical_preprocessor: str = "OneHotEncoder",
+        parallelism_mode: str = "model",
     ) -> Dict[str, Any]:
         """
         训练 XGBoost 模型
@@ -162,6 +326,7 @@ class XGBoostModel(BaseModel):
             n_trials: 优化尝试次数
             numeric_preprocessor: 数值特征预处理方法
             categorical_preprocessor: 分类特征预处理方法
+            parallelism_mode: 参数搜索的并行方式，见 optimize
 
         Returns:
             Dict[str, Any]: 包含训练结果的字典
@@ -172,8 +337,9 @@ class XGBoostModel(BaseModel):
         self.categorical_preprocessor = categorical_preprocessor
 
         if self.problem_type == "classification":
-            self.label_encoder = LabelEncoder()
-            y_train_encoded = self.label_encoder.fit_transform(y_train)
+            # 一次遍历同时得到编码与排好序的类别，编码结果与 LabelEncoder 一致
+            codes, self.label_classes = pd.factorize(y_train, sort=True)
+            y_train_encoded = codes.astype(np.int32)
         else:
             y_train_encoded = np.array(y_train)
 
@@ -190,6 +356,7 @@ class XGBoostModel(BaseModel):
             "min_child_weight": (1, 10),
             "reg_alpha": (0, 10),
             "reg_lambda": (0, 10),
+            "max_bin": (64, 512),
         }
 
         if param_ranges:
@@ -204,6 +371,7 @@ class XGBoostModel(BaseModel):
             numerical_cols,
             param_ranges,
             n_trials,
+            parallelism_mode=parallelism_mode,
         )
 
         self.model = best_pipeline
@@ -217,12 +385,9 @@ class XGBoostModel(BaseModel):
         }
 
         if self.problem_type == "classification":
-            results["label_encoding"] = dict(
-                zip(
-                    self.label_encoder.classes_,
-                    self.label_encoder.transform(self.label_encoder.classes_),
-                )
-            )
+            results["label_encoding"] = {
+                label: code for code, label in enumerate(self.label_classes)
+            }
         else:
             results["cv_mean_score"] = abs(results["cv_mean_score"])
 
@@ -241,8 +406,10 @@ class XGBoostModel(BaseModel):
             Dict[str, Any]: 包含评估指标的字典
         """
         self.logger.info("开始 XGBoost 模型评估")
-        if self.problem_type == "classification" and self.label_encoder is not None:
-            y_test_encoded = self.label_encoder.transform(y_test)
+        if self.problem_type == "classification" and self.label_classes is not None:
+            y_test_encoded = self.label_classes.get_indexer(y_test).astype(np.int32)
+            if (y_test_encoded == -1).any():
+                raise ValueError("测试集中包含训练集中未出现的目标类别")
         else:
             y_test_encoded = np.array(y_test)
         return evaluate_model(self.model, X_test, y_test_encoded, self.problem_type)
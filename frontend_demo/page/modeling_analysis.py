@@ -92,8 +92,6 @@ def display_operation_settings():
 
 def main():
     """主函数，控制页面流程"""
-    initialize_session_state()
-
     st.title("🤖 算法建模分析与预测")
     st.markdown("---")
 
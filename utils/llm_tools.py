@@ -318,10 +318,12 @@ class CustomEmbeddings(Embeddings):
         api_key: str,
         api_url: str,
         model: str,
+        batch_size: int = 1,
     ):
         self.api_key = api_key
         self.api_url = api_url
         self.model = model
+        self.batch_size = max(1, batch_size)
 
     def _get_embeddings(self, texts: List[str]) -> List[List[float]]:
         headers = {
@@ -332,14 +334,19 @@ class CustomEmbeddings(Embeddings):
 
         all_embeddings = []
 
-        for text in texts:
-            payload = {"model": self.model, "input": text, "encoding_format": "float"}
+        for start in range(0, len(texts), self.batch_size):
+            batch = texts[start : start + self.batch_size]
+            payload = {
+                "model": self.model,
+                "input": batch[0] if self.batch_size == 1 else batch,
+                "encoding_format": "float",
+            }
 
             response = requests.post(self.api_url, headers=headers, json=payload)
             response.raise_for_status()  # Raises an HTTPError for bad responses
 
-            embedding = response.json()["data"][0]["embedding"]
-            all_embeddings.append(embedding)
+            data = sorted(response.json()["data"], key=lambda d: d.get("index", 0))
+            all_embeddings.extend(item["embedding"] for item in data)
 
         return all_embeddings
 